@@ -0,0 +1,162 @@
+import math
+from collections import Counter
+
+# 评分直方图的桶宽
+RATING_BIN = 0.5
+
+
+def as_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def as_int(value):
+    if isinstance(value, str):
+        value = value.replace(",", "")
+    value = as_float(value)
+    return None if value is None else int(value)
+
+
+def as_list(value):
+    """CSV 中以 | 分隔的字符串或列式文件中的列表，统一为列表"""
+    if isinstance(value, list):
+        return [item for item in value if item]
+    if isinstance(value, str) and value:
+        return [item for item in value.split("|") if item]
+    return []
+
+
+def as_date(value):
+    # YYYY-MM-DD 字符串可以直接按字符串比较大小
+    return value if isinstance(value, str) and len(value) >= 10 else None
+
+
+def rating_bucket(rating):
+    start = min(math.floor(rating / RATING_BIN) * RATING_BIN, 5 - RATING_BIN)
+    return f"{start:.1f}-{start + RATING_BIN:.1f}"
+
+
+class Aggregates:
+    """
+    数据集加载时一次算好的类型化列、筛选用的倒排表和各类统计：
+    类目计数、评分直方图、发布年份/月份分布、语言分布，以及按评论数排好序的行号。
+    没有筛选条件的统计请求直接返回预先算好的结果。
+    """
+
+    def __init__(self, records):
+        self.size = len(records)
+        self.ratings = [as_float(r.get("rating")) for r in records]
+        self.reviews = [as_int(r.get("reviews_count")) for r in records]
+        self.dates = [as_date(r.get("release_date")) for r in records]
+        self.categories = [as_list(r.get("category")) for r in records]
+        self.locales = [
+            r.get("locale") if isinstance(r.get("locale"), str) else None for r in records
+        ]
+
+        # 类目 -> 行号列表（升序），筛选时求交集
+        self.category_rows = {}
+        for row, categories in enumerate(self.categories):
+            for category in dict.fromkeys(categories):
+                self.category_rows.setdefault(category, []).append(row)
+
+        # 按评论数从高到低排好的行号，取前 N 名时不需要排序
+        self.by_reviews = sorted(
+            (row for row in range(self.size) if self.reviews[row] is not None),
+            key=lambda row: (-self.reviews[row], row),
+        )
+        self.all_facets = self.facets(range(self.size))
+
+    def filter(
+        self, rows, category=None, min_rating=None, date_from=None, date_to=None, locale=None
+    ):
+        """按筛选条件过滤行号（保持升序），没有条件时原样返回"""
+        conditions = (category, min_rating, date_from, date_to, locale)
+        if all(value is None for value in conditions):
+            return rows
+        if category is not None:
+            allowed = self.category_rows.get(category, [])
+            if isinstance(rows, range) and len(rows) == self.size:
+                rows = allowed
+            else:
+                allowed = set(allowed)
+                rows = [row for row in rows if row in allowed]
+        result = []
+        for row in rows:
+            if min_rating is not None:
+                rating = self.ratings[row]
+                if rating is None or rating < min_rating:
+                    continue
+            if date_from is not None or date_to is not None:
+                released = self.dates[row]
+                if released is None:
+                    continue
+                if date_from is not None and released < date_from:
+                    continue
+                if date_to is not None and released > date_to:
+                    continue
+            if locale is not None and self.locales[row] != locale:
+                continue
+            result.append(row)
+        return result
+
+    def facets(self, rows):
+        """对给定行号计算各维度的分布和汇总"""
+        categories = Counter()
+        ratings = Counter()
+        years = Counter()
+        months = Counter()
+        locales = Counter()
+        rated = 0
+        rating_sum = 0.0
+        reviews_sum = 0
+        count = 0
+        for row in rows:
+            count += 1
+            categories.update(dict.fromkeys(self.categories[row], 1))
+            rating = self.ratings[row]
+            if rating is not None:
+                ratings[rating_bucket(rating)] += 1
+                rated += 1
+                rating_sum += rating
+            if self.reviews[row] is not None:
+                reviews_sum += self.reviews[row]
+            released = self.dates[row]
+            if released:
+                years[released[:4]] += 1
+                months[released[:7]] += 1
+            if self.locales[row]:
+                locales[self.locales[row]] += 1
+        return {
+            "count": count,
+            "summary": {
+                "avg_rating": round(rating_sum / rated, 3) if rated else None,
+                "total_reviews": reviews_sum,
+            },
+            "categories": [
+                {"value": value, "count": n} for value, n in categories.most_common()
+            ],
+            "rating_histogram": [
+                {"bucket": bucket, "count": ratings[bucket]} for bucket in sorted(ratings)
+            ],
+            "release_years": [{"bucket": y, "count": years[y]} for y in sorted(years)],
+            "release_months": [{"bucket": m, "count": months[m]} for m in sorted(months)],
+            "locales": [{"value": value, "count": n} for value, n in locales.most_common()],
+        }
+
+    def top_by_reviews(self, limit=10, rows=None):
+        """评论数前 limit 名的行号；传入 rows 时只在这些行中取"""
+        if rows is None:
+            return self.by_reviews[:limit]
+        if not isinstance(rows, (list, range)):
+            rows = list(rows)
+        allowed = rows if isinstance(rows, range) else set(rows)
+        top = []
+        for row in self.by_reviews:
+            if row in allowed:
+                top.append(row)
+                if len(top) >= limit:
+                    break
+        return top
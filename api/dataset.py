@@ -0,0 +1,288 @@
+import base64
+import bisect
+import hashlib
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+from aggregates import Aggregates
+from publish import manifest_path, read_manifest
+from search_index import FullTextIndex
+
+
+# 同一次爬取有多种格式时，按顺序优先使用列式文件
+DATA_EXTENSIONS = [".arrow", ".parquet", ".csv"] if HAS_PYARROW else [".csv"]
+
+
+def get_latest_file(directory="."):
+    # 获取目录下所有数据文件
+    files = [
+        f
+        for f in os.listdir(directory)
+        if f.startswith("app_titles_") and os.path.splitext(f)[1] in DATA_EXTENSIONS
+    ]
+
+    if not files:
+        raise FileNotFoundError("没有找到app_titles_开头的数据文件")
+
+    # 按文件名排序，获取最新的文件
+    latest_file = max(
+        files,
+        key=lambda f: (
+            os.path.splitext(f)[0],
+            -DATA_EXTENSIONS.index(os.path.splitext(f)[1]),
+        ),
+    )
+    return os.path.join(directory, latest_file)
+
+
+# 列式文件中为列表类型的字段，返回给接口时与 CSV 一样以 | 连接
+LIST_FIELDS = ("detail_points", "category")
+
+
+def normalize_record(record):
+    """
+    把记录统一为与 CSV 相同的接口形状：列表以 | 连接为字符串，日期为 YYYY-MM-DD，
+    缺失值为 None（CSV 中的 NaN 不是合法 JSON），评论数为整数。
+    """
+    for field, value in record.items():
+        if isinstance(value, float) and math.isnan(value):
+            record[field] = None
+        elif isinstance(value, list):
+            record[field] = "|".join(value)
+        elif isinstance(value, date):
+            record[field] = value.isoformat()
+    reviews_count = record.get("reviews_count")
+    if isinstance(reviews_count, float):
+        record["reviews_count"] = int(reviews_count)
+    return record
+
+
+def load_records(path):
+    """
+    读取数据文件，返回 (字段列表, 记录列表)。
+    .arrow 文件通过内存映射读取后直接转换为记录，列式文件自带类型，不需要重新推断；
+    不论读取哪种格式，记录的形状都相同。
+    """
+    if path.endswith(".csv"):
+        df = pd.read_csv(path)
+        fields = list(df.columns)
+        records = df.to_dict("records")
+    else:
+        if path.endswith(".parquet"):
+            table = pq.read_table(path, memory_map=True)
+        else:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        fields = table.schema.names
+        records = table.to_pylist()
+    for record in records:
+        normalize_record(record)
+    return fields, records
+
+
+class Dataset:
+    """
+    一次加载后不再变化的数据集：预先转换好的记录列表、
+    标题的二元字符索引和多字段全文索引，搜索和分页都不需要重新读取或扫描 CSV。
+    """
+
+    def __init__(self, path, query_cache_size=256):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        # 数据集版本，用于 ETag 和校验游标是否属于当前数据集
+        self.version = hashlib.sha1(f"{path}:{self.mtime}".encode()).hexdigest()[:12]
+        self.fields, self.records = load_records(path)
+        self.titles = [
+            title.lower() if isinstance(title, str) else ""
+            for title in (record.get("title") for record in self.records)
+        ]
+        self.bigrams = {}
+        for row, title in enumerate(self.titles):
+            for gram in {title[i : i + 2] for i in range(len(title) - 1)}:
+                self.bigrams.setdefault(gram, []).append(row)
+        self.fulltext = FullTextIndex(self.records)
+        self.aggregates = Aggregates(self.records)
+        self.query_cache = OrderedDict()
+        self.query_cache_size = query_cache_size
+        self.lock = threading.Lock()
+
+    def search(self, term):
+        """返回标题包含 term（不区分大小写）的行号列表，结果按查询词缓存"""
+        if not term:
+            return range(len(self.records))
+        term = term.lower()
+        with self.lock:
+            rows = self.query_cache.get(term)
+            if rows is not None:
+                self.query_cache.move_to_end(term)
+                return rows
+
+        if len(term) >= 2:
+            # 用二元字符倒排表求交集得到候选行，再逐一确认子串匹配
+            postings = []
+            for gram in {term[i : i + 2] for i in range(len(term) - 1)}:
+                posting = self.bigrams.get(gram)
+                if not posting:
+                    postings = []
+                    break
+                postings.append(posting)
+            if postings:
+                postings.sort(key=len)
+                candidates = set(postings[0])
+                for posting in postings[1:]:
+                    candidates.intersection_update(posting)
+                rows = [row for row in sorted(candidates) if term in self.titles[row]]
+            else:
+                rows = []
+        else:
+            rows = [row for row, title in enumerate(self.titles) if term in title]
+
+        with self.lock:
+            self.query_cache[term] = rows
+            if len(self.query_cache) > self.query_cache_size:
+                self.query_cache.popitem(last=False)
+        return rows
+
+    def rank(self, term, start, end, after=None, fields=None, allowed=None):
+        """
+        全文检索，返回 (命中总数, 当前页记录, 下一页游标)，记录附带 score 字段。
+        after 为解码后的游标 (行号, 分数)，传入时忽略 start，从游标之后取 end - start 条。
+        allowed 为筛选后允许的行号集合。
+        """
+        if after is not None:
+            row, score = after
+            total, ranked = self.fulltext.search(
+                term, top_k=end - start, after=(score, row), allowed=allowed
+            )
+        else:
+            total, ranked = self.fulltext.search(term, top_k=end, allowed=allowed)
+            ranked = ranked[start:end]
+        apps_list = [
+            dict(self.project(self.records[row], fields), score=round(score, 4))
+            for row, score in ranked
+        ]
+        # 偏移分页时可以确定后面还有没有结果；游标分页时取满一页就给出下一页游标
+        has_more = len(ranked) == end - start if after is not None else end < total
+        cursor = None
+        if ranked and has_more:
+            row, score = ranked[-1]
+            cursor = self.encode_cursor(row, score)
+        return total, apps_list, cursor
+
+    def page(self, rows, start, end, fields=None):
+        return [self.project(self.records[row], fields) for row in rows[start:end]]
+
+    def page_after(self, rows, after, limit, fields=None):
+        """
+        游标分页：rows 按行号升序，从行号 after 之后取 limit 条，
+        二分定位起点，耗时与页码深度无关。返回 (当前页记录, 下一页游标)。
+        """
+        start = bisect.bisect_right(rows, after) if after is not None else 0
+        page_rows = rows[start : start + limit]
+        cursor = None
+        if len(page_rows) == limit and start + limit < len(rows):
+            cursor = self.encode_cursor(page_rows[-1])
+        return [self.project(self.records[row], fields) for row in page_rows], cursor
+
+    @staticmethod
+    def project(record, fields):
+        if not fields:
+            return record
+        return {field: record.get(field) for field in fields}
+
+    def encode_cursor(self, row, score=None):
+        payload = [self.version, row] if score is None else [self.version, row, score]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """返回 (行号, 分数或 None)；游标无效或数据集已更新时抛出 ValueError"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            version, row = payload[0], int(payload[1])
+            score = float(payload[2]) if len(payload) > 2 else None
+        except (ValueError, TypeError, IndexError):
+            raise ValueError("无效的游标")
+        if version != self.version:
+            raise ValueError("数据已更新，游标失效，请从第一页重新开始")
+        return row, score
+
+
+class DatasetCache:
+    """
+    进程内的数据集缓存。爬虫发布过数据集时只 stat 清单文件 latest.json，
+    清单被替换时才加载其中登记的文件；还没有清单时退回到按目录查找：
+    目录的 mtime 变化（出现新文件）或当前文件的 mtime 变化时才重新查找最新文件并加载。
+    auto_reload 为 False 时 get 始终返回已加载的数据集，由调用方（多进程服务的主进程）
+    调用 refresh 检查并重新加载。
+    """
+
+    def __init__(self, directory=".", auto_reload=True):
+        self.directory = directory
+        self.auto_reload = auto_reload
+        self.dataset = None
+        self.dir_mtime = None
+        self.manifest_mtime = None
+        self.lock = threading.Lock()
+
+    def load(self, latest):
+        dataset = self.dataset
+        if (
+            dataset is None
+            or dataset.path != latest
+            or os.path.getmtime(latest) != dataset.mtime
+        ):
+            print(f"加载数据文件: {latest}")
+            dataset = Dataset(latest)
+            self.dataset = dataset
+        return dataset
+
+    def get(self):
+        dataset = self.dataset
+        if dataset is not None and not self.auto_reload:
+            return dataset
+        return self.refresh()
+
+    def refresh(self):
+        """检查是否有新数据集，有则加载，返回当前数据集"""
+        try:
+            manifest_mtime = os.stat(manifest_path(self.directory)).st_mtime
+        except FileNotFoundError:
+            manifest_mtime = None
+        dataset = self.dataset
+
+        if manifest_mtime is not None:
+            if dataset is not None and manifest_mtime == self.manifest_mtime:
+                return dataset
+            with self.lock:
+                manifest = read_manifest(self.directory)
+                if manifest is not None:
+                    dataset = self.load(os.path.join(self.directory, manifest["dataset"]))
+                    self.manifest_mtime = manifest_mtime
+                    return dataset
+
+        dir_mtime = os.stat(self.directory).st_mtime
+        if dataset is not None and dir_mtime == self.dir_mtime:
+            try:
+                if os.path.getmtime(dataset.path) == dataset.mtime:
+                    return dataset
+            except OSError:
+                pass
+
+        with self.lock:
+            dataset = self.load(get_latest_file(self.directory))
+            self.dir_mtime = dir_mtime
+            return dataset
@@ -1,25 +1,117 @@
-from flask import Flask, jsonify, request
-import pandas as pd
-from flask_cors import CORS
+import glob
+import gzip
+import hashlib
+import json
 import os
+import sys
+import time
+
+from flask import Flask, Response, g, jsonify, request
+from flask_cors import CORS
+
+# 与爬虫共用项目根目录下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset import DatasetCache
+from history_store import METRICS, HistoryStore
+from telemetry import Metrics, summary_to_prometheus
 
 app = Flask(__name__)
 app.json.ensure_ascii = False  # 这里设置全局的 JSON 编码选项
 CORS(app)  # 启用CORS以允许前端访问
 
 
-def get_latest_csv():
-    # 获取当前目录下所有文件
-    files = [
-        f for f in os.listdir(".") if f.startswith("app_titles_") and f.endswith(".csv")
-    ]
+# 数据集只加载一次，爬虫发布新数据集（或出现新文件、文件被修改）时自动重新加载
+dataset_cache = DatasetCache(".")
+
+# 接口请求的延迟和状态码统计，通过 /metrics 导出
+api_metrics = Metrics(prefix="api")
+
+# 小于该字节数的响应不压缩
+GZIP_MIN_SIZE = 1024
+
+# 评分/评论数历史库，由爬虫在每次爬取结束后写入
+HISTORY_DB = "app_history.sqlite"
+history_store = None
+
+
+def get_history():
+    global history_store
+    if history_store is None and os.path.exists(HISTORY_DB):
+        history_store = HistoryStore(HISTORY_DB)
+    return history_store
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    start = getattr(g, "request_start", None)
+    if start is not None and request.endpoint != "metrics":
+        api_metrics.observe(request.endpoint or "unknown", time.perf_counter() - start)
+        api_metrics.inc(
+            "responses", endpoint=request.endpoint or "unknown", status=str(response.status_code)
+        )
+    return response
+
+
+@app.after_request
+def compress_response(response):
+    """客户端支持时对较大的 JSON 响应做 gzip 压缩"""
+    response.vary.add("Accept-Encoding")
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "gzip" not in request.headers.get("Accept-Encoding", "")
+        or "Content-Encoding" in response.headers
+        or response.mimetype != "application/json"
+    ):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_SIZE:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
 
-    if not files:
-        raise FileNotFoundError("没有找到app_titles_开头的CSV文件")
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus 格式的指标：接口延迟、状态码，以及最近一次爬取的摘要"""
+    text = api_metrics.render_prometheus()
+    summaries = sorted(glob.glob("crawl_metrics_*.json"))
+    if summaries:
+        with open(summaries[-1], encoding="utf-8") as f:
+            text += summary_to_prometheus(json.load(f))
+    return Response(text, mimetype="text/plain; version=0.0.4")
 
-    # 按文件名排序，获取最新的文件
-    latest_file = sorted(files)[-1]
-    return latest_file
+
+def hash_query(query_string):
+    return hashlib.sha1(query_string).hexdigest()[:12]
+
+
+def conditional_etag(dataset):
+    """返回 (etag, 304 响应或 None)；同一数据集上的同一查询结果不变，命中时不再执行查询"""
+    etag = f"{dataset.version}-{hash_query(request.query_string)}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return etag, response
+    return etag, None
+
+
+def get_filters():
+    """筛选参数：category 类目、min_rating 最低评分、date_from / date_to 发布日期范围、locale 语言"""
+    return {
+        "category": request.args.get("category") or None,
+        "min_rating": request.args.get("min_rating", None, type=float),
+        "date_from": request.args.get("date_from") or None,
+        "date_to": request.args.get("date_to") or None,
+        "locale": request.args.get("locale") or None,
+    }
 
 
 @app.route("/api/apps/search", methods=["GET"])
@@ -29,39 +121,79 @@ def search_apps():
         page = request.args.get("page", 1, type=int)
         per_page = request.args.get("per_page", 10, type=int)
         search_term = request.args.get("q", "")
+        # title: 标题子串匹配（默认）；fulltext: 多字段全文检索，按相关度排序
+        mode = request.args.get("mode", "title")
+        # 上一页返回的 next_cursor；传入时按游标翻页，忽略 page
+        cursor = request.args.get("cursor")
+        # 只返回指定字段，例如 fields=title,rating,url
+        fields = [f for f in request.args.get("fields", "").split(",") if f]
+        # count=0 时不返回总数
+        with_total = request.args.get("count", "1") != "0"
 
-        print(
-            f"搜索参数: page={page}, per_page={per_page}, q={search_term}"
-        )  # 调试信息
+        # 类目、最低评分、发布日期范围、语言筛选
+        filters = get_filters()
 
-        # 读取最新的CSV文件
-        latest_file = get_latest_csv()
-        print(f"准备读取文件: {latest_file}")  # 调试信息
+        # 获取缓存的数据集
+        dataset = dataset_cache.get()
 
-        df = pd.read_csv(latest_file)
+        etag, not_modified = conditional_etag(dataset)
+        if not_modified:
+            return not_modified
 
-        # 搜索过滤
-        if search_term:
-            df = df[df["title"].str.contains(search_term, case=False, na=False)]
+        unknown = [f for f in fields if f not in dataset.fields]
+        if unknown:
+            return jsonify({"status": "error", "message": f"未知字段: {','.join(unknown)}"}), 400
+
+        after = None
+        if cursor:
+            try:
+                after = dataset.decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
 
         # 计算分页
-        total = len(df)
         start = (page - 1) * per_page
         end = start + per_page
+        start, end = max(start, 0), max(end, 0)
+
+        if mode == "fulltext" and search_term:
+            if after is not None and after[1] is None:
+                return jsonify({"status": "error", "message": "游标与查询模式不匹配"}), 400
+            allowed = None
+            if any(value is not None for value in filters.values()):
+                allowed = set(
+                    dataset.aggregates.filter(range(len(dataset.records)), **filters)
+                )
+            total, apps_list, next_cursor = dataset.rank(
+                search_term, start, end, after=after, fields=fields, allowed=allowed
+            )
+        else:
+            # 搜索过滤
+            rows = dataset.aggregates.filter(dataset.search(search_term), **filters)
+            total = len(rows)
 
-        # 切片获取当前页数据
-        apps_list = df.iloc[start:end].to_dict("records")
+            if after is not None:
+                apps_list, next_cursor = dataset.page_after(
+                    rows, after[0], max(per_page, 0), fields=fields
+                )
+            else:
+                # 切片获取当前页数据
+                apps_list = dataset.page(rows, start, end, fields=fields)
+                next_cursor = dataset.encode_cursor(rows[end - 1]) if 0 < end < total else None
 
         response_data = {
             "status": "success",
             "data": apps_list,
-            "total": total,
             "page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor,
         }
+        if with_total:
+            response_data["total"] = total
 
-        print(f"返回数据: {response_data}")  # 调试信息
-        return jsonify(response_data)
+        response = jsonify(response_data)
+        response.set_etag(etag, weak=True)
+        return response
 
     except Exception as e:
         error_response = {"status": "error", "message": str(e)}
@@ -69,6 +201,82 @@ def search_apps():
         return jsonify(error_response), 500
 
 
+@app.route("/api/apps/facets", methods=["GET"])
+def app_facets():
+    """
+    类目计数、评分直方图、发布年份/月份分布、语言分布和汇总统计。
+    支持与搜索相同的 q 和筛选参数；没有任何条件时直接返回加载数据集时算好的结果。
+    """
+    search_term = request.args.get("q", "")
+    filters = get_filters()
+    dataset = dataset_cache.get()
+    etag, not_modified = conditional_etag(dataset)
+    if not_modified:
+        return not_modified
+
+    aggregates = dataset.aggregates
+    if not search_term and all(value is None for value in filters.values()):
+        facets = aggregates.all_facets
+    else:
+        facets = aggregates.facets(aggregates.filter(dataset.search(search_term), **filters))
+    response = jsonify({"status": "success", "data": facets})
+    response.set_etag(etag, weak=True)
+    return response
+
+
+@app.route("/api/apps/top", methods=["GET"])
+def top_apps():
+    """评论数最多的前 limit 个应用，支持筛选参数和 fields 字段投影"""
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 1000)
+    fields = [f for f in request.args.get("fields", "").split(",") if f]
+    filters = get_filters()
+    dataset = dataset_cache.get()
+    etag, not_modified = conditional_etag(dataset)
+    if not_modified:
+        return not_modified
+
+    unknown = [f for f in fields if f not in dataset.fields]
+    if unknown:
+        return jsonify({"status": "error", "message": f"未知字段: {','.join(unknown)}"}), 400
+    aggregates = dataset.aggregates
+    rows = None
+    if any(value is not None for value in filters.values()):
+        rows = aggregates.filter(range(len(dataset.records)), **filters)
+    top = aggregates.top_by_reviews(limit, rows)
+    data = [dataset.project(dataset.records[row], fields) for row in top]
+    response = jsonify({"status": "success", "by": "reviews_count", "data": data})
+    response.set_etag(etag, weak=True)
+    return response
+
+
+@app.route("/api/apps/trend", methods=["GET"])
+def app_trend():
+    """单个应用评分和评论数的历史变化"""
+    url = request.args.get("url", "")
+    history = get_history()
+    if history is None:
+        return jsonify({"status": "error", "message": "没有历史数据"}), 404
+    if not url:
+        return jsonify({"status": "error", "message": "缺少 url 参数"}), 400
+    return jsonify({"status": "success", "url": url, "data": history.trend(url)})
+
+
+@app.route("/api/apps/movers", methods=["GET"])
+def top_movers():
+    """评分或评论数变化最大的应用，days 为比较的时间窗口，默认与最早的记录比较"""
+    metric = request.args.get("metric", "reviews_count")
+    days = request.args.get("days", None, type=float)
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 100)
+    ascending = request.args.get("order", "desc") == "asc"
+    history = get_history()
+    if history is None:
+        return jsonify({"status": "error", "message": "没有历史数据"}), 404
+    if metric not in METRICS:
+        return jsonify({"status": "error", "message": f"不支持的指标: {metric}"}), 400
+    movers = history.top_movers(metric, days=days, limit=limit, ascending=ascending)
+    return jsonify({"status": "success", "metric": metric, "data": movers})
+
+
 if __name__ == "__main__":
-    # 启动 Web 服务器
+    # 启动开发服务器；生产环境使用 python api/serve.py（多进程，预加载数据集）
     app.run(debug=True, port=5000)
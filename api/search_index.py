@@ -0,0 +1,91 @@
+import heapq
+import math
+import re
+
+# 连续的中日韩字符按二元切分，其余按字母数字单词切分
+CJK_RANGES = "぀-ヿ㐀-䶿一-鿿가-힯豈-﫿"
+TOKEN_RE = re.compile(f"([{CJK_RANGES}]+)|([^\\W_{CJK_RANGES}]+)")
+
+# 参与全文检索的字段及权重
+SEARCH_FIELDS = {
+    "title": 3.0,
+    "category": 1.5,
+    "main_description": 1.5,
+    "detail_points": 1.0,
+    "detailed_description": 1.0,
+}
+
+
+def tokenize(text):
+    if isinstance(text, list):
+        # 列式文件中的详细点和类目是列表
+        text = " ".join(item for item in text if item)
+    if not isinstance(text, str):
+        return []
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(text.lower()):
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i : i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+
+class FullTextIndex:
+    """
+    多字段倒排索引，按 BM25F 打分：
+    每个字段的词频先按字段长度归一化并乘以字段权重，再做 BM25 饱和。
+    归一化后的词频在建索引时算好，查询时只需累加。
+    """
+
+    def __init__(self, records, fields=SEARCH_FIELDS, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.size = len(records)
+
+        field_tokens = {field: [] for field in fields}
+        for record in records:
+            for field in fields:
+                field_tokens[field].append(tokenize(record.get(field)))
+
+        weighted_tf = {}  # term -> {row: 归一化加权词频}
+        for field, weight in fields.items():
+            docs = field_tokens[field]
+            avg_len = sum(len(tokens) for tokens in docs) / max(len(docs), 1) or 1
+            for row, tokens in enumerate(docs):
+                if not tokens:
+                    continue
+                norm = weight / (1 - b + b * len(tokens) / avg_len)
+                counts = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, tf in counts.items():
+                    postings = weighted_tf.setdefault(token, {})
+                    postings[row] = postings.get(row, 0.0) + tf * norm
+
+        # 预先算好 idf * tf / (k1 + tf)，查询时直接相加
+        self.postings = {}
+        for token, postings in weighted_tf.items():
+            idf = math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            self.postings[token] = [
+                (row, idf * tf / (k1 + tf)) for row, tf in postings.items()
+            ]
+
+    def search(self, query, top_k=10, after=None, allowed=None):
+        """
+        返回 (命中文档数, [(行号, 分数), ...])，按分数从高到低取前 top_k 个。
+        after 为上一页最后一条的 (分数, 行号)，只返回排在它之后的结果（游标分页）。
+        allowed 为允许的行号集合（筛选条件），为 None 时不限制。
+        """
+        scores = {}
+        for token in set(tokenize(query)):
+            for row, score in self.postings.get(token, ()):
+                if allowed is None or row in allowed:
+                    scores[row] = scores.get(row, 0.0) + score
+        items = scores.items()
+        if after is not None:
+            last = (after[0], -after[1])
+            items = [item for item in items if (item[1], -item[0]) < last]
+        top = heapq.nlargest(top_k, items, key=lambda item: (item[1], -item[0]))
+        return len(scores), top
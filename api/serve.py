@@ -0,0 +1,224 @@
+"""
+生产环境入口：多进程运行 /api/apps/search，替代 getData.py 中的开发服务器。
+
+数据集在主进程中加载一次后再 fork 出 worker，worker 之间通过写时复制共享同一份数据，
+而不是每个进程各自读取一份数据和索引。worker 不自行重新加载；主进程定期检查，
+发现新数据集时加载一次，再用新的 worker 替换旧的 worker。
+
+用法: python api/serve.py --workers 4 --port 5000 --data-dir .
+安装了 gunicorn 时使用 gunicorn（gthread worker，preload_app），
+否则使用内置的预 fork 服务器（werkzeug，仅限 Linux/macOS）；
+--server waitress 使用 waitress（单进程多线程，Windows 可用）。
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+try:
+    from gunicorn.app.base import BaseApplication
+
+    HAS_GUNICORN = True
+except ImportError:
+    HAS_GUNICORN = False
+
+try:
+    import waitress
+
+    HAS_WAITRESS = True
+except ImportError:
+    HAS_WAITRESS = False
+
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+# 主进程检查新数据集的间隔（秒）
+RELOAD_INTERVAL = 30.0
+
+
+def load_app():
+    """导入应用并预先加载最新的数据集，之后冻结 GC，避免 fork 后因 GC 扫描触发写时复制"""
+    import getData
+
+    # worker 中不再检查和加载新数据集，只使用 fork 时主进程中的数据集
+    getData.dataset_cache.auto_reload = False
+    dataset = getData.dataset_cache.refresh()
+    print(f"已预加载数据集: {dataset.path}（{len(dataset.records)} 条记录）")
+    gc.collect()
+    gc.freeze()
+    return getData.app
+
+
+def reload_dataset():
+    """在主进程中检查新数据集，加载了新数据集时返回 True，此后需要重新 fork worker"""
+    import getData
+
+    previous = getData.dataset_cache.dataset
+    try:
+        dataset = getData.dataset_cache.refresh()
+    except Exception as e:
+        print(f"加载新数据集失败，继续使用当前数据集: {e}")
+        return False
+    if dataset is previous:
+        return False
+    print(f"已加载新数据集: {dataset.path}（{len(dataset.records)} 条记录），替换 worker")
+    gc.collect()
+    gc.freeze()
+    return True
+
+
+if HAS_GUNICORN:
+
+    class GunicornServer(BaseApplication):
+        def __init__(self, app, options):
+            self.application = app
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    def watch_dataset(arbiter):
+        """
+        gunicorn 主进程中的后台线程：加载新数据集后发送 HUP，
+        preload_app 下 gunicorn 从主进程重新 fork 新 worker 并停止旧 worker。
+        """
+
+        def run():
+            while True:
+                time.sleep(RELOAD_INTERVAL)
+                if reload_dataset():
+                    os.kill(os.getpid(), signal.SIGHUP)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def serve_gunicorn(app, host, port, workers, threads):
+    GunicornServer(
+        app,
+        {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "threads": threads,
+            "worker_class": "gthread",
+            "preload_app": True,
+            "when_ready": watch_dataset,
+        },
+    ).run()
+
+
+def serve_prefork(app, host, port, workers, threads):
+    """
+    内置的预 fork 服务器：主进程监听端口后 fork 出 workers 个子进程，
+    子进程共用同一个监听 socket，各自用 werkzeug 处理请求。
+    主进程每隔 RELOAD_INTERVAL 秒检查新数据集，加载后先 fork 新的一批 worker 再停止旧的。
+    """
+    listener = socket.create_server((host, port), backlog=1024)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    def spawn():
+        pids = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                server = make_server(
+                    host, port, app, threaded=threads > 1, fd=listener.fileno()
+                )
+                server.serve_forever()
+                os._exit(0)
+            pids.append(pid)
+        return pids
+
+    def terminate(pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+    children = spawn()
+    print(f"已启动 {workers} 个 worker，监听 {host}:{port}")
+
+    stopped = threading.Event()
+
+    def stop(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while children and not stopped.wait(RELOAD_INTERVAL):
+            # 回收已退出的 worker
+            for pid in list(children):
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    children.remove(pid)
+            if reload_dataset():
+                old, children = children, spawn()
+                terminate(old)
+    finally:
+        terminate(children)
+        listener.close()
+
+
+def serve_waitress(app, host, port, workers, threads):
+    # waitress 不 fork，只能用线程扩展
+    waitress.serve(app, host=host, port=port, threads=workers * threads)
+
+
+SERVERS = {
+    "gunicorn": serve_gunicorn,
+    "prefork": serve_prefork,
+    "waitress": serve_waitress,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程运行搜索 API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=4, help="每个 worker 的线程数")
+    parser.add_argument("--data-dir", default=".", help="app_titles_* 数据文件所在目录")
+    parser.add_argument(
+        "--server",
+        choices=["auto"] + sorted(SERVERS),
+        default="auto",
+        help="auto 时优先 gunicorn，其次内置预 fork 服务器",
+    )
+    args = parser.parse_args()
+
+    server = args.server
+    if server == "auto":
+        server = "gunicorn" if HAS_GUNICORN else "prefork"
+    if server == "gunicorn" and not HAS_GUNICORN:
+        parser.error("没有安装 gunicorn")
+    if server == "waitress" and not HAS_WAITRESS:
+        parser.error("没有安装 waitress")
+    if server == "prefork" and not hasattr(os, "fork"):
+        parser.error("当前系统不支持 fork，请安装 waitress 并使用 --server waitress")
+
+    os.chdir(args.data_dir)
+    app = load_app()
+    SERVERS[server](app, args.host, args.port, args.workers, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,50 @@
+import argparse
+import functools
+import itertools
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
 import os
 import glob
 import time
-import subprocess
-
-
-def run_scraper():
-    print("未找到CSV文件，正在运行 scraper.py...")
-    try:
-        subprocess.run(["python", "scraper.py"], check=True)
-        print("scraper.py 运行完成")
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"运行 scraper.py 时出错: {e}")
-        return False
+from concurrent.futures import ProcessPoolExecutor
+
+from columnar import COLUMNAR_FORMATS, ColumnarWriter, columnar_path, csv_to_columnar
+from extractors import (
+    BACKENDS,
+    DEFAULT_BACKEND,
+    LOCALE_RULES,
+    locale_url,
+    parse_app_page,
+    split_locale,
+)
+from fetch_engine import fetch_all
+from history_store import METRICS, HistoryStore, crawl_time_from_path
+from http_client import HttpClient
+from page_archive import PageArchive, read_blob
+from parse_pool import ParsePipeline
+from publish import publish_dataset
+from recrawl_scheduler import RecrawlScheduler
+from result_writer import StreamingResultWriter, find_resumable_run
+from retry_scheduler import (
+    RETRY_STATUS,
+    AimdController,
+    RetryableError,
+    RetryPolicy,
+    parse_retry_after,
+)
+from scraper import ShopifyAppScraper
+from state_store import CrawlStateStore, hash_bytes
+from telemetry import Metrics
+
+
+# 逐个 URL 的日志输出本身有开销，默认只定期输出进度，--verbose 时才逐条输出
+VERBOSE = False
+PROGRESS_EVERY = 100
+
+
+def log(message):
+    if VERBOSE:
+        print(message)
 
 
 def get_latest_csv(prefix="shopify_apps_", silent=False):
@@ -23,15 +52,7 @@ def get_latest_csv(prefix="shopify_apps_", silent=False):
     if not csv_files:
         if not silent:
             print(f"没有找到前缀为 {prefix} 的CSV文件")
-            # 运行 scraper.py
-            if run_scraper():
-                # 重新检查CSV文件
-                csv_files = glob.glob(f"{prefix}*.csv")
-                if not csv_files:
-                    print("即使运行了 scraper.py 后仍未找到CSV文件")
-                    return None
-            else:
-                return None
+        return None
 
     latest_csv = max(csv_files, key=os.path.getmtime)
     if not silent:
@@ -39,327 +60,769 @@ def get_latest_csv(prefix="shopify_apps_", silent=False):
     return latest_csv
 
 
-def scrape_app_details(batch_size=None, delay=0.5):
-    csv_file = get_latest_csv()
-    if not csv_file:
+def load_app_urls(from_sitemap=False):
+    """
+    返回 (应用链接, 是否边下载 sitemap 边产出)。
+    没有 shopify_apps_*.csv 时不再另起进程运行 scraper.py 再读回它生成的 CSV，
+    而是在本进程内直接流式解析 sitemap。
+    """
+    if not from_sitemap:
+        csv_file = get_latest_csv()
+        if csv_file:
+            return pd.read_csv(csv_file)["app_handle"].tolist(), False
+        print("改为直接从 sitemap 读取应用链接")
+    # sitemap 使用独立的连接，下载过程中不占用抓取详情页的连接池
+    return ShopifyAppScraper().iter_app_urls(), True
+
+
+def is_complete(data, incomplete_information):
+    # 如果所有必需字段都有值，则认为成功
+    return bool(
+        data["title"]
+        and data["rating"]
+        and data["main_description"]
+        and data["detailed_description"]
+        and data["detail_points"]
+        and data["category"]
+        and data["reviews_count"]
+        and data["release_date"]
+        and data["url"]
+        or incomplete_information
+    )
+
+
+def fetch_page(client, url, state=None, previous=None, archive=None):
+    """
+    请求单个页面，返回 page 字典。
+    传入 state（CrawlStateStore）时发送条件请求，304 或响应体未变化时
+    page["record"] 为上一次的记录，无需再解析。
+    传入 archive（PageArchive）时把 200 响应的原始 HTML 存档。
+    限流、服务端错误和网络错误抛出 RetryableError，由抓取引擎安排重试。
+    """
+    headers = state.conditional_headers(previous) if state else None
+    try:
+        response = client.get(url, headers=headers)
+    except requests.RequestException as e:
+        raise RetryableError(f"请求失败: {e}") from e
+    if response.status_code in RETRY_STATUS:
+        raise RetryableError(
+            f"HTTP错误: {response.status_code}",
+            status_code=response.status_code,
+            retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        )
+    page = {
+        "url": url,
+        "status_code": response.status_code,
+        "content": None,
+        "encoding": response.encoding or "utf-8",
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "body_hash": None,
+        "record": None,
+    }
+
+    if response.status_code == 304 and previous and previous["record"]:
+        state.touch(url)
+        page["record"] = previous["record"]
+        return page
+
+    if response.status_code == 200:
+        page["content"] = response.content
+        if state or archive:
+            page["body_hash"] = hash_bytes(response.content)
+        if archive:
+            archive.put(url, response.content, page["encoding"], page["body_hash"])
+        if state:
+            if (
+                previous
+                and previous["record"]
+                and previous["body_hash"] == page["body_hash"]
+            ):
+                state.touch(url, page["etag"], page["last_modified"])
+                page["record"] = previous["record"]
+    return page
+
+
+def parse_page(url, content, encoding="utf-8", parser=None):
+    """解析原始 HTML 字节，可在解析子进程中执行"""
+    return parse_app_page(url, content.decode(encoding, "replace"), backend=parser)
+
+
+def store_record(page, parsed, state=None):
+    """解析结果完整时保存到状态库，返回 (data 或 None, 状态)"""
+    data, field_errors, incomplete_information = parsed
+    if not is_complete(data, incomplete_information):
+        return None, "failed"
+
+    status = "changed"
+    if state and not state.save(
+        page["url"], data, page["etag"], page["last_modified"], page["body_hash"]
+    ):
+        status = "unchanged"
+    return data, status
+
+
+def field_error_rows(url, field_errors):
+    return [
+        {"url": url, "field": error["field"], "error_message": error["error"]}
+        for error in field_errors
+    ]
+
+
+def scrape_url(
+    client, url, label="", state=None, parser=None, metrics=None, archive=None
+):
+    """
+    抓取并解析单个应用页面，返回 (data 或 None, 错误列表, 状态)。
+    状态为 changed / unchanged / skipped / failed；
+    传入 state 时 304 或响应体未变化的页面跳过解析，直接沿用上一次的记录。
+    parser 为解析后端（lxml / bs4），默认优先 lxml。
+    可重试的失败会抛出 RetryableError。传入 metrics 时记录解析耗时，
+    传入 archive 时保存原始 HTML。
+    """
+    errors = []
+    previous = state.get(url) if state else None
+
+    try:
+        log(f"正在处理 {label}{url}")
+
+        page = fetch_page(client, url, state, previous, archive)
+        if page["record"]:
+            log(f"内容未变化，沿用上次数据: {page['record']['title']}")
+            return page["record"], errors, "skipped"
+
+        if page["status_code"] == 200:
+            parse_start = time.perf_counter()
+            parsed = parse_page(url, page["content"], page["encoding"], parser)
+            if metrics:
+                metrics.observe("parse", time.perf_counter() - parse_start)
+            data, status = store_record(page, parsed, state)
+            if data:
+                log(f"成功获取数据: {data['title']}")
+                return data, errors, status
+            errors.extend(field_error_rows(url, parsed[1]))
+        else:
+            errors.append(
+                {
+                    "url": url,
+                    "field": "http_request",
+                    "error_message": f"HTTP错误: {page['status_code']}",
+                }
+            )
+
+    except RetryableError:
+        raise
+    except Exception as e:
+        errors.append(
+            {
+                "url": url,
+                "field": "request",
+                "error_message": f"请求失败: {str(e)}",
+            }
+        )
+
+    return None, errors, "failed"
+
+
+def give_up(url, error):
+    """重试次数用完后记录错误"""
+    field = "http_request" if error.status_code else "request"
+    return None, [{"url": url, "field": field, "error_message": str(error)}], "failed"
+
+
+def pipeline_scrape(
+    client,
+    urls,
+    fetchers,
+    parsers,
+    rate=None,
+    state=None,
+    parser=None,
+    retry=None,
+    controller=None,
+    metrics=None,
+    archive=None,
+):
+    """
+    流水线模式：抓取线程只负责下载，原始 HTML 经有界队列交给解析进程池，
+    主线程汇总结果。按完成顺序产出 (url, (data 或 None, 错误列表, 状态))，
+    结束后可通过返回的 pipeline.print_stats() 查看各阶段吞吐。
+    """
+
+    def fetch(url):
+        log(f"正在处理 {url}")
+        previous = state.get(url) if state else None
+        page = fetch_page(client, url, state, previous, archive)
+        if page["record"]:
+            return "result", (page["record"], [], "skipped")
+        if page["status_code"] != 200:
+            error = {
+                "url": url,
+                "field": "http_request",
+                "error_message": f"HTTP错误: {page['status_code']}",
+            }
+            return "result", (None, [error], "failed")
+        return "parse", page
+
+    def finish(url, page, parsed, error):
+        if error is not None:
+            field = "parse" if page else "request"
+            message = f"解析失败: {error}" if page else f"请求失败: {error}"
+            return None, [{"url": url, "field": field, "error_message": message}], "failed"
+        data, status = store_record(page, parsed, state)
+        if data:
+            return data, [], status
+        return None, field_error_rows(url, parsed[1]), status
+
+    pipeline = ParsePipeline(
+        fetch,
+        functools.partial(parse_pipeline_page, parser=parser),
+        finish,
+        fetchers=fetchers,
+        parsers=parsers,
+        fetch_options={
+            "rate": rate,
+            "retry": retry,
+            "controller": controller,
+            "give_up": lambda url, error: ("result", give_up(url, error)),
+            "metrics": metrics,
+            "log": log,
+        },
+        metrics=metrics,
+    )
+    return pipeline, pipeline.run(urls)
+
+
+def parse_pipeline_page(page, parser=None):
+    return parse_page(page["url"], page["content"], page["encoding"], parser)
+
+
+def parse_archived_page(entry, directory, parser=None):
+    """在解析子进程中读取存档并解析，返回 (url, 解析结果, 错误信息)"""
+    url, body_hash, encoding = entry
+    try:
+        content = read_blob(directory, body_hash)
+        return url, parse_page(url, content, encoding or "utf-8", parser), None
+    except Exception as e:
+        return url, None, str(e)
+
+
+def reextract_archive(
+    archive_dir="page_archive", batch_size=None, parser=None, parsers=0, columnar=None
+):
+    """
+    离线模式：不访问网络，对存档中的原始 HTML 重新提取字段并输出新的 app_titles_*.csv。
+    解析规则修改后用它代替重新爬取；parsers 大于 0 时由多个子进程并行读取和解析。
+    """
+    archive = PageArchive(archive_dir)
+    entries = archive.entries()
+    archive.close()
+    if batch_size:
+        entries = entries[:batch_size]
+    if not entries:
+        print(f"存档 {archive_dir} 中没有页面")
         return
+    print(f"从存档 {archive_dir} 重新提取 {len(entries)} 个页面")
+
+    parse = functools.partial(parse_archived_page, directory=archive_dir, parser=parser)
+    executor = ProcessPoolExecutor(max_workers=parsers) if parsers else None
+    if executor:
+        results = executor.map(parse, entries, chunksize=32)
+    else:
+        results = map(parse, entries)
 
-    df = pd.read_csv(csv_file)
-    results = []
-    errors = []  # 存储错误信息
     timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-    max_retries = 1  # 最大重试次数
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+    writer = StreamingResultWriter(timestamp)
+    finished = False
+    start_time = time.monotonic()
+    try:
+        for url, parsed, error in results:
+            if error is not None:
+                errors = [
+                    {"url": url, "field": "parse", "error_message": f"解析失败: {error}"}
+                ]
+                writer.write(url, None, errors)
+                continue
+            data, field_errors, incomplete_information = parsed
+            if is_complete(data, incomplete_information):
+                writer.write(url, data, [])
+            else:
+                writer.write(url, None, field_error_rows(url, field_errors))
+        finished = True
+    finally:
+        writer.close(finished=finished)
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.monotonic() - start_time
+    print(
+        f"共提取 {len(entries)} 个页面，用时 {elapsed:.1f} 秒，"
+        f"{len(entries) / max(elapsed, 1e-9):.2f} 页/秒"
+    )
+    print_written(writer)
+    if columnar and os.path.exists(writer.results.path):
+        columnar_path, rows = csv_to_columnar(writer.results.path, columnar)
+        print(f"列式文件已保存到: {columnar_path}（{rows} 条记录）")
+
+
+def expand_locales(urls, locales):
+    """每个应用按语言展开为多个带 locale 参数的链接，同一应用的各语言相邻"""
+    for url in urls:
+        app_url, _ = split_locale(url)
+        for locale in locales:
+            yield locale_url(app_url, locale)
+
+
+def print_written(writer):
+    """打印结果和错误文件的总行数；--resume 时另外注明本次写入的行数"""
+    for output, name, label in (
+        (writer.results, "结果", "总记录数"),
+        (writer.errors, "错误记录", "错误数量"),
+    ):
+        if not output.total:
+            continue
+        print(f"{name}已保存到: {output.path}")
+        if output.existing:
+            print(f"{label}: {output.total}（本次写入 {output.rows}）")
+        else:
+            print(f"{label}: {output.total}")
+
+
+def carry_forward(state, urls, visited, write):
+    """
+    --time-budget 或 --batch-size 截断的优先级爬取只访问了部分应用，
+    未访问的应用沿用状态库中上一次的记录，结果文件仍是完整的数据集。
+    返回 (沿用的条数, 没有记录可沿用的条数)。
+    """
+    carried = missing = 0
+    for url in urls:
+        if url in visited:
+            continue
+        previous = state.get(url)
+        if previous and previous["record"]:
+            write(url, previous["record"])
+            carried += 1
+        else:
+            missing += 1
+    return carried, missing
+
+
+def within_budget(urls, deadline):
+    """到达截止时间后不再产出新的 URL，已开始的请求照常完成"""
+    for url in urls:
+        if time.monotonic() >= deadline:
+            print("时间预算已用完，剩余的URL留到下一次爬取")
+            return
+        yield url
+
+
+def scrape_app_details(
+    batch_size=None,
+    delay=0.5,
+    concurrency=1,
+    rate=None,
+    incremental=False,
+    state_db="crawl_state.sqlite",
+    parser=None,
+    parsers=0,
+    resume=False,
+    columnar=None,
+    from_sitemap=False,
+    max_retries=3,
+    archive_dir=None,
+    history_db="app_history.sqlite",
+    prioritize=False,
+    time_budget=None,
+    locales=None,
+    publish=False,
+):
+    """
+    concurrency 为并发抓取线程数，rate 为每秒最多请求数（令牌桶限速）。
+    未指定 rate 时按 1 / delay 计算，与原先逐条 sleep 的速率一致。
+    incremental 为 True 时使用 state_db 中保存的状态做条件请求，只解析有变化的应用。
+    parsers 大于 0 时启用流水线模式，由 parsers 个子进程负责解析。
+    结果边爬边追加写入 CSV，resume 为 True 时从最近一次未完成的爬取继续，
+    跳过检查点中已完成的 URL。
+    columnar 为 parquet 或 arrow 时，边爬边另外写出带类型的列式文件。
+    from_sitemap 为 True 时不读取 CSV，直接边下载 sitemap 边抓取应用详情；
+    没有 shopify_apps_*.csv 时也会这样做。
+    被限流（429/503）、服务端错误和网络错误的 URL 按指数退避重新排队，最多重试
+    max_retries 次；被限流时自动降低并发，恢复后再逐步提高。
+    archive_dir 不为空时把原始 HTML 压缩存档到该目录，之后可用 reextract_archive 离线重新提取。
+    history_db 不为空时，爬取完成后把评分和评论数的变化导入该历史库。
+    prioritize 为 True 时按“自上次抓取以来已变化的概率”排序（依赖状态库和历史库），
+    batch_size 和 time_budget（秒，到时不再开始新的 URL）只截取优先级最高的部分，
+    结束时输出新鲜度覆盖。
+    locales 为语言列表（如 ["zh-CN", "en", "ja", "de"]）时，每个应用按各语言各抓取一次，
+    共用同一个连接池和限速，按各语言的规则解析，结果以 应用 + 语言 区分写入同一个文件。
+    publish 为 True 时，爬取完整结束后把结果（有列式文件时用列式文件）原子发布为 API 使用的最新数据集。
+    返回结果 CSV 的路径。
+    """
+    metrics = Metrics()
+    client = HttpClient(pool_size=concurrency, metrics=metrics)
+    urls, streaming = load_app_urls(from_sitemap)
+
+    if locales:
+        urls = expand_locales(urls, locales)
+        if not streaming:
+            urls = list(urls)
+        print(f"多语言模式: {', '.join(locales)}")
+
+    if prioritize and not incremental:
+        print("优先级调度依赖增量模式的状态库，已自动启用 --incremental")
+        incremental = True
+    state = CrawlStateStore(state_db) if incremental else None
+
+    scheduler = None
+    if prioritize:
+        urls = list(urls)
+        history = (
+            HistoryStore(history_db) if history_db and os.path.exists(history_db) else None
+        )
+        scheduler = RecrawlScheduler(state, history)
+        if history:
+            history.close()
+        all_urls = urls
+        urls = scheduler.order(urls)
+        print(f"已按变化概率排序 {len(urls)} 个URL")
+
+    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+
+    if batch_size:
+        urls = itertools.islice(urls, batch_size)
+
+    resumed = False
+    completed = set()
+    if resume:
+        resume_timestamp, completed = find_resumable_run()
+        if resume_timestamp:
+            timestamp = resume_timestamp
+            resumed = True
+            urls = (url for url in urls if url not in completed)
+            print(f"从检查点继续爬取 {timestamp}，跳过已完成的 {len(completed)} 个URL")
+        else:
+            print("没有找到可继续的检查点，开始新的爬取")
+
+    if isinstance(urls, list):
+        total_items = len(urls)
+    elif not streaming:
+        urls = list(urls)
+        total_items = len(urls)
+    else:
+        total_items = None  # sitemap 边下载边消费，总数未知
+
+    if rate is None:
+        rate = 1 / delay if delay else None
+
+    if time_budget:
+        urls = within_budget(urls, time.monotonic() + time_budget)
+    status_counts = {"changed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+
+    retry = RetryPolicy(max_retries=max_retries, base_delay=max(1.0, delay * 2))
+    controller = AimdController(max_limit=concurrency)
+    archive = PageArchive(archive_dir) if archive_dir else None
+
+    def worker(url):
+        return scrape_url(
+            client, url, state=state, parser=parser, metrics=metrics, archive=archive
+        )
+
+    pipeline = None
+    if parsers:
+        pipeline, scraped = pipeline_scrape(
+            client,
+            urls,
+            concurrency,
+            parsers,
+            rate=rate,
+            state=state,
+            parser=parser,
+            retry=retry,
+            controller=controller,
+            metrics=metrics,
+            archive=archive,
+        )
+    else:
+        scraped = fetch_all(
+            urls,
+            worker,
+            concurrency=concurrency,
+            rate=rate,
+            retry=retry,
+            controller=controller,
+            give_up=give_up,
+            metrics=metrics,
+            log=log,
+        )
+
+    writer = StreamingResultWriter(timestamp)
+    # 列式文件和历史库直接使用爬取得到的记录，不再回读 CSV；
+    # 继续中断的爬取时 CSV 中有之前的记录，仍在结束后从 CSV 转换和导入
+    table_writer = None
+    if columnar and not resumed:
+        table_writer = ColumnarWriter(columnar_path(writer.results.path, columnar), columnar)
+    history = ingest = None
+    history_rows = []
+    if history_db and not resumed:
+        # 历史库边爬边分批导入，每批与结果写入同样大小，内存占用与应用总数无关
+        history = HistoryStore(history_db)
+        ingest = history.begin_ingest(
+            crawl_time_from_path(writer.results.path), writer.results.path
+        )
+    visited = set(completed) if scheduler else None
+    incomplete = False
+    finished = False
+    start_time = time.monotonic()
+    try:
+        for done, (url, (data, url_errors, status)) in enumerate(scraped, 1):
+            write_start = time.perf_counter()
+            if visited is not None:
+                visited.add(url)
+            writer.write(url, data, url_errors)
+            if data:
+                if table_writer:
+                    table_writer.write(data)
+                if ingest:
+                    history_rows.append({field: data.get(field) for field in ("url",) + METRICS})
+                    if len(history_rows) >= writer.batch_size:
+                        ingest.add(history_rows)
+                        history_rows = []
+            metrics.observe("write", time.perf_counter() - write_start)
+            metrics.inc("pages", status=status)
+            status_counts[status] += 1
+            if VERBOSE or done % PROGRESS_EVERY == 0:
+                print(f"进度 {done}/{total_items or '?'}")
+        if scheduler:
+
+            def write_previous(url, record):
+                writer.write(url, record, [])
+                if table_writer:
+                    table_writer.write(record)
+
+            carried, missing = carry_forward(state, all_urls, visited, write_previous)
+            if carried:
+                print(f"本次未访问的 {carried} 个应用沿用上一次的记录")
+            if missing:
+                print(f"有 {missing} 个应用从未成功抓取过，本次结果不是完整的数据集")
+                incomplete = True
+        finished = True
+    finally:
+        # 中断时也把已完成的结果落盘，检查点保留以便 --resume
+        writer.close(finished=finished)
+        if table_writer:
+            table_writer.close(finished=finished)
+        if not finished:
+            # 中断的爬取不写入历史库，--resume 完成后再从 CSV 导入
+            if ingest:
+                ingest.abort()
+            if history:
+                history.close()
+            print(f"爬取中断，已保存的进度可用 --resume 继续: {writer.checkpoint_path}")
+
+    if archive:
+        print(f"原始页面已存档到 {archive_dir}，共 {archive.count()} 个URL")
+        archive.close()
+
+    if scheduler:
+        freshness = scheduler.print_coverage(all_urls)
+        metrics.set("fresh_pct", freshness["fresh_pct"])
+        metrics.set("expected_stale", freshness["expected_stale"])
+
+    if state:
+        state.close()
+        fetched = status_counts["changed"] + status_counts["unchanged"]
+        print(
+            f"增量爬取: 抓取解析 {fetched}，跳过 {status_counts['skipped']}，"
+            f"有变化 {status_counts['changed']}，失败 {status_counts['failed']}"
+        )
+
+    elapsed = time.monotonic() - start_time
+    processed = sum(status_counts.values())
+    if elapsed > 0:
+        print(
+            f"共处理 {processed} 个页面，用时 {elapsed:.1f} 秒，"
+            f"{processed / elapsed:.2f} 页/秒"
+        )
+    client.print_stats()
+    client_stats = client.stats()
+    client.close()
+    controller_stats = controller.stats()
+    print(
+        f"被限流 {controller_stats['throttled']} 次，熔断 {controller_stats['breaker_trips']} 次，"
+        f"结束时并发上限 {controller_stats['concurrency_limit']}"
+    )
+    if pipeline:
+        pipeline.print_stats()
+
+    print("各阶段耗时:")
+    metrics.print_summary()
+    metrics_file = f"crawl_metrics_{timestamp}.json"
+    metrics.write_summary(
+        metrics_file,
+        timestamp=timestamp,
+        elapsed_seconds=round(elapsed, 3),
+        pages=status_counts,
+        http=client_stats,
+        controller=controller_stats,
+        pipeline=pipeline.stats() if pipeline else None,
+    )
+    print(f"指标摘要已保存到: {metrics_file}")
+
+    # 结果已在爬取过程中写入
+    print_written(writer)
+
+    output_path = writer.results.path
+    if table_writer:
+        output_path = table_writer.path
+        print(f"列式文件已保存到: {output_path}（{table_writer.rows} 条记录）")
+    elif columnar and os.path.exists(writer.results.path):
+        output_path, rows = csv_to_columnar(writer.results.path, columnar)
+        print(f"列式文件已保存到: {output_path}（{rows} 条记录）")
+
+    if history_db and os.path.exists(writer.results.path):
+        if ingest:
+            ingest.add(history_rows)
+            rows, changed = ingest.finish()
+        else:
+            history = history or HistoryStore(history_db)
+            rows, changed = history.ingest_csv(writer.results.path)
+        print(f"历史库 {history_db}: 导入 {rows} 条记录，{changed} 个应用的评分或评论数有变化")
+    elif ingest:
+        ingest.abort()
+    if history:
+        history.close()
+
+    if publish and incomplete:
+        print("结果缺少部分应用，不发布为最新数据集")
+    elif publish and os.path.exists(output_path):
+        publish_dataset(output_path, timestamp=timestamp)
+    return writer.results.path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="根据最新 csv 爬取应用详情")
+    parser.add_argument("--batch-size", type=int, default=None, help="最大爬取数")
+    parser.add_argument("--delay", type=float, default=0.5, help="请求间隔（秒）")
+    parser.add_argument("--concurrency", type=int, default=1, help="并发抓取线程数")
+    parser.add_argument(
+        "--rate", type=float, default=None, help="每秒最多请求数，默认 1 / delay"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", help="增量模式，只重新解析有变化的应用"
+    )
+    parser.add_argument(
+        "--state-db", default="crawl_state.sqlite", help="增量模式使用的状态库路径"
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(BACKENDS),
+        default=DEFAULT_BACKEND,
+        help="页面解析后端，lxml 只遍历一次文档树，bs4 为后备",
+    )
+    parser.add_argument(
+        "--parsers",
+        type=int,
+        default=0,
+        help="解析进程数，大于 0 时启用 抓取线程 → 有界队列 → 解析进程池 的流水线模式",
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="从最近一次中断的爬取继续，跳过已完成的URL"
+    )
+    parser.add_argument(
+        "--columnar",
+        choices=sorted(COLUMNAR_FORMATS),
+        default=None,
+        help="额外输出带类型的列式文件（需要 pyarrow）",
+    )
+    parser.add_argument(
+        "--from-sitemap",
+        action="store_true",
+        help="不读取 shopify_apps_*.csv，边下载 sitemap 边抓取应用详情",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=3, help="限流或服务端错误时的最大重试次数"
+    )
+    parser.add_argument(
+        "--verbose", action="store_true", help="逐个 URL 输出处理日志"
+    )
+    parser.add_argument(
+        "--archive",
+        default=None,
+        help="把原始 HTML 压缩存档到该目录（按内容哈希去重）",
+    )
+    parser.add_argument(
+        "--from-archive",
+        default=None,
+        help="不访问网络，对该存档目录中的页面重新提取字段",
+    )
+    parser.add_argument(
+        "--history-db",
+        default="app_history.sqlite",
+        help="评分/评论数历史库路径，传空字符串不导入",
+    )
+    parser.add_argument(
+        "--prioritize",
+        action="store_true",
+        help="按变化概率排序，优先重爬最可能已变化的应用（自动启用增量模式）",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="爬取时间预算（秒），到时不再开始新的URL",
+    )
+    parser.add_argument(
+        "--locales",
+        default=None,
+        help=f"逗号分隔的语言列表，每个应用按各语言各抓取一次，可选 {','.join(LOCALE_RULES)}",
+    )
+    parser.add_argument(
+        "--publish",
+        action="store_true",
+        help="爬取完整结束后把结果原子发布为 API 使用的最新数据集（latest.json）",
+    )
+    args = parser.parse_args()
+
+    locales = args.locales.split(",") if args.locales else None
+    if locales:
+        unknown = [locale for locale in locales if locale not in LOCALE_RULES]
+        if unknown:
+            parser.error(f"不支持的语言: {','.join(unknown)}")
+
+    global VERBOSE
+    VERBOSE = args.verbose
+
+    if args.from_archive:
+        reextract_archive(
+            args.from_archive,
+            batch_size=args.batch_size,
+            parser=args.parser,
+            parsers=args.parsers,
+            columnar=args.columnar,
+        )
+        return
 
-    total_items = batch_size if batch_size else len(df)
-
-    for index, row in df.iterrows():
-        if batch_size and index >= batch_size:
-            break
-
-        url = row["app_handle"]
-        retry_count = 0
-        success = False
-
-        while retry_count < max_retries and not success:
-            try:
-                print(
-                    f"正在处理 {index + 1}/{total_items} - {url} (第 {retry_count + 1} 次尝试)"
-                )
-
-                response = requests.get(url, headers=headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, "html.parser")
-                    field_errors = []  # 记录每个字段的错误
-
-                    data = {
-                        "url": url,
-                        "title": None,
-                        "rating": None,
-                        "reviews_count": None,
-                        "main_description": None,
-                        "detailed_description": None,
-                        "detail_points": None,
-                        "category": None,
-                        "release_date": None,
-                        "website": None,  # 新增官网字段
-                        "complete_information": True,
-                    }
-
-                    incomplete_information = soup.find(
-                        "div",
-                        {
-                            "class": "banner tw-bg-canvas-accent-orange tw-border-stroke-accent-orange tw-text-fg-accent-orange tw-py-4 lg:tw-py-8"
-                        },
-                    )
-                    data["complete_information"] = (
-                        False if incomplete_information else True
-                    )
-
-                    if data["complete_information"]:
-                        # 获取标题
-                        try:
-                            title = soup.find(
-                                "h1",
-                                {
-                                    "class": "tw-text-heading-lg tw-whitespace-normal tw-hyphens tw-text-balance -tw-my-xs"
-                                },
-                            )
-                            data["title"] = title.text.strip() if title else None
-                            if not data["title"]:
-                                field_errors.append(
-                                    {"field": "title", "error": "标题未找到"}
-                                )
-                        except Exception as e:
-                            field_errors.append({"field": "title", "error": str(e)})
-
-                        # 获取评分和评论
-                        try:
-                            rating_section = soup.find(
-                                "dd",
-                                {
-                                    "class": "tw-flex tw-items-center tw-gap-2xs tw-text-body-sm"
-                                },
-                            )
-                            if rating_section:
-                                rating_span = rating_section.find("span")
-                                data["rating"] = (
-                                    rating_span.text.strip() if rating_span else None
-                                )
-                                if not data["rating"]:
-                                    field_errors.append(
-                                        {"field": "rating", "error": "评分未找到"}
-                                    )
-                                try:
-                                    review_link = rating_section.find_all("span")[2]
-                                    if review_link.find("a"):
-                                        reviews_text = review_link.text.strip()
-                                        data["reviews_count"] = (
-                                            reviews_text.strip("()")
-                                            .replace(",", "")
-                                            .strip()
-                                        )
-                                    elif review_link:
-                                        data["reviews_count"] = 0
-                                    else:
-                                        field_errors.append(
-                                            {
-                                                "field": "reviews_count",
-                                                "error": "评论数未找到",
-                                            }
-                                        )
-                                except Exception as e:
-                                    field_errors.append(
-                                        {"field": "reviews_count", "error": str(e)}
-                                    )
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "rating_section", "error": str(e)}
-                            )
-
-                        # 获取主要描述
-                        try:
-                            main_desc = soup.find(
-                                "h2", {"class": "tw-text-heading-lg tw-text-pretty"}
-                            )
-                            data["main_description"] = (
-                                main_desc.text.strip() if main_desc else None
-                            )
-                            if not data["main_description"]:
-                                field_errors.append(
-                                    {
-                                        "field": "main_description",
-                                        "error": "主要描述未找到",
-                                    }
-                                )
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "main_description", "error": str(e)}
-                            )
-
-                        # 获取详细描述
-                        try:
-                            detailed_desc = soup.find(
-                                "p",
-                                {
-                                    "class": "tw-hidden lg:tw-block tw-text-body-md tw-text-fg-secondary"
-                                },
-                            )
-                            data["detailed_description"] = (
-                                detailed_desc.text.strip() if detailed_desc else None
-                            )
-                            if not data["detailed_description"]:
-                                field_errors.append(
-                                    {
-                                        "field": "detailed_description",
-                                        "error": "详细描述未找到",
-                                    }
-                                )
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "detailed_description", "error": str(e)}
-                            )
-
-                        # 获取详细点
-                        try:
-                            detail_elements = soup.find_all(
-                                "li",
-                                {
-                                    "class": "tw-text-body-md tw-text-fg-secondary tw-mb-xs"
-                                },
-                            )
-                            if detail_elements:
-                                data["detail_points"] = "|".join(
-                                    [
-                                        element.text.strip()
-                                        for element in detail_elements
-                                    ]
-                                )
-                            else:
-                                field_errors.append(
-                                    {
-                                        "field": "detail_points",
-                                        "error": "详细点列表未找到",
-                                    }
-                                )
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "detail_points", "error": str(e)}
-                            )
-                            
-                        # 获取分类
-                        try:
-                            category_divs = soup.find_all(
-                                "div",
-                                {"class": "tw-flex tw-justify-between tw-mb-xl"}
-                            )
-                            if category_divs:
-                                categories = []
-                                for div in category_divs:
-                                    a_tags = div.find_all('a')
-                                    if a_tags:
-                                        categories.extend([a.text.strip() for a in a_tags])
-                                data["category"] = "|".join(categories) if categories else None
-                            else:
-                                field_errors.append({
-                                    "field": "category",
-                                    "error": "类目未找到",
-                                })
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "category", "error": str(e)}
-                            )
-
-                        # 获取发布日期
-                        try:
-                            release_date = soup.find(
-                                "p",
-                                {
-                                    "class": "tw-col-span-full sm:tw-col-span-3 tw-text-fg-secondary tw-text-body-md"
-                                },
-                            )
-                            if release_date:
-                                # 分割文本并只保留日期部分
-                                date_text = release_date.text.split('·')[0].strip()
-                                # 将中文年月日替换为标准格式
-                                date_text = date_text.replace('年', '-').replace('月', '-').replace('日', '')
-                                # 转换为日期对象并格式化为 YYYY-MM-DD 格式
-                                from datetime import datetime
-                                date_obj = datetime.strptime(date_text, '%Y-%m-%d')
-                                data["release_date"] = date_obj.strftime('%Y-%m-%d')
-                            else:
-                                field_errors.append({
-                                    "field": "release_date",
-                                    "error": "发布日期没找到",
-                                })
-                        except Exception as e:
-                            field_errors.append(
-                                {"field": "release_date", "error": str(e)}
-                            )
-
-                        # 获取官网
-                        try:
-                            website_link = soup.find("a", string="网站")
-                            data["website"] = (
-                                website_link["href"] if website_link else None
-                            )
-                        except Exception:
-                            pass  # 如果没有找到网站链接，静默失败
-
-                    # 如果有字段错误且是最后一次重试
-                    if field_errors and retry_count == max_retries - 1:
-                        for error in field_errors:
-                            errors.append(
-                                {
-                                    "url": url,
-                                    "field": error["field"],
-                                    "error_message": error["error"],
-                                }
-                            )
-
-                    # 如果所有必需字段都有值，则认为成功
-                    if (
-                        data["title"]
-                        and data["rating"]
-                        and data["main_description"]
-                        and data["detailed_description"]
-                        and data["detail_points"]
-                        and data["category"]
-                        and data["reviews_count"]
-                        and data["release_date"]
-                        and data["url"]
-                        or incomplete_information
-                    ):
-                        results.append(data)
-                        success = True
-                        print(f"成功获取数据: {data['title']}")
-
-                else:
-                    if retry_count == max_retries - 1:
-                        errors.append(
-                            {
-                                "url": url,
-                                "field": "http_request",
-                                "error_message": f"HTTP错误: {response.status_code}",
-                            }
-                        )
-
-            except Exception as e:
-                if retry_count == max_retries - 1:
-                    errors.append(
-                        {
-                            "url": url,
-                            "field": "request",
-                            "error_message": f"请求失败: {str(e)}",
-                        }
-                    )
-
-            if not success:
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"重试 {retry_count}/{max_retries}")
-                    time.sleep(delay * 2)
-
-            time.sleep(delay)
-
-    # 保存结果
-    if results:
-        output_file = f"app_titles_{timestamp}.csv"
-        output_df = pd.DataFrame(results)
-        output_df.to_csv(output_file, index=False, encoding="utf-8-sig")
-        print(f"结果已保存到: {output_file}")
-        print(f"总记录数: {len(output_df)}")
-
-    # 保存错误记录
-    if errors:
-        error_file = f"scraping_errors_{timestamp}.csv"
-        error_df = pd.DataFrame(errors)
-        error_df.to_csv(error_file, index=False, encoding="utf-8-sig")
-        print(f"错误记录已保存到: {error_file}")
-        print(f"错误数量: {len(errors)}")
+    scrape_app_details(
+        batch_size=args.batch_size,
+        delay=args.delay,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        incremental=args.incremental,
+        state_db=args.state_db,
+        parser=args.parser,
+        parsers=args.parsers,
+        resume=args.resume,
+        columnar=args.columnar,
+        from_sitemap=args.from_sitemap,
+        max_retries=args.max_retries,
+        archive_dir=args.archive,
+        history_db=args.history_db,
+        prioritize=args.prioritize,
+        time_budget=args.time_budget,
+        locales=locales,
+        publish=args.publish,
+    )
 
 
 if __name__ == "__main__":
-    scrape_app_details(delay=0.5)
+    main()
@@ -0,0 +1,101 @@
+"""
+/api/apps/search 压测：在本地生成的数据集上比较
+每次请求重新读取 CSV 的旧实现（before）与缓存数据集（after）的 请求/秒 和延迟分位数。
+
+用法: python benchmarks/bench_api.py --rows 12000 --requests 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+import pandas as pd
+from flask import Flask, jsonify, request
+
+from generate_dataset import generate
+
+
+def legacy_app():
+    """优化前的实现：每个请求 listdir + read_csv + str.contains"""
+    app = Flask("legacy")
+    app.json.ensure_ascii = False
+
+    @app.route("/api/apps/search")
+    def search_apps():
+        page = request.args.get("page", 1, type=int)
+        per_page = request.args.get("per_page", 10, type=int)
+        search_term = request.args.get("q", "")
+        files = [
+            f for f in os.listdir(".") if f.startswith("app_titles_") and f.endswith(".csv")
+        ]
+        df = pd.read_csv(sorted(files)[-1])
+        if search_term:
+            df = df[df["title"].str.contains(search_term, case=False, na=False)]
+        total = len(df)
+        start = (page - 1) * per_page
+        apps_list = df.iloc[start : start + per_page].to_dict("records")
+        return jsonify(
+            {"status": "success", "data": apps_list, "total": total, "page": page, "per_page": per_page}
+        )
+
+    return app
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(app, queries, label):
+    client = app.test_client()
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.get("/api/apps/search")  # 预热，缓存实现在这里完成首次加载
+        start = time.perf_counter()
+        for query in queries:
+            t = time.perf_counter()
+            response = client.get("/api/apps/search", query_string=query)
+            latencies.append((time.perf_counter() - t) * 1000)
+            assert response.status_code == 200, response.data
+        elapsed = time.perf_counter() - start
+    print(
+        f"{label:>7}: {len(queries) / elapsed:>8.1f} 请求/秒  "
+        f"p50 {percentile(latencies, 50):.2f}ms  p90 {percentile(latencies, 90):.2f}ms  "
+        f"p99 {percentile(latencies, 99):.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    terms = ["", "shop", "seo", "营销", "review", "bundle 物流", "Chat"]
+    queries = [
+        {"q": rng.choice(terms), "page": rng.randint(1, 20), "per_page": 20}
+        for _ in range(args.requests)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.rows)
+        os.chdir(directory)
+        print(f"数据集 {args.rows} 行，{args.requests} 个请求")
+        run(legacy_app(), queries, "before")
+
+        import getData
+
+        run(getData.app, queries, "after")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+列式存储基准：比较 CSV、Parquet、Arrow IPC 三种格式的加载耗时和常驻内存（RSS）。
+每种格式在独立子进程中加载，RSS 为加载后减去导入依赖后的增量。
+
+用法: python benchmarks/bench_columnar.py --rows 12000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from columnar import csv_to_columnar
+from generate_dataset import generate
+
+LOADER = r"""
+import sys, time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS"):
+                return int(line.split()[1])
+
+path, mode = sys.argv[1], sys.argv[2]
+base = rss_kb()
+start = time.perf_counter()
+if path.endswith(".csv"):
+    obj = pd.read_csv(path)
+elif path.endswith(".parquet"):
+    obj = pq.read_table(path, memory_map=True)
+else:
+    obj = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+if mode == "pandas" and not path.endswith(".csv"):
+    obj = obj.to_pandas()
+elapsed = (time.perf_counter() - start) * 1000
+print(f"{elapsed:.1f} {(rss_kb() - base) / 1024:.1f}")
+"""
+
+
+def measure(path, mode):
+    output = subprocess.run(
+        [sys.executable, "-c", LOADER, path, mode], capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = generate(directory, args.rows)
+        paths = [csv_path]
+        for fmt in ("parquet", "arrow"):
+            paths.append(csv_to_columnar(csv_path, fmt)[0])
+
+        print(f"{args.rows} 行")
+        print(f"{'格式':>10} {'文件MB':>8} {'加载方式':>8} {'耗时ms':>8} {'RSS增量MB':>10}")
+        for path in paths:
+            size = os.path.getsize(path) / 1024 / 1024
+            ext = os.path.splitext(path)[1]
+            modes = ["pandas"] if ext == ".csv" else ["table", "pandas"]
+            for mode in modes:
+                elapsed, rss = measure(path, mode)
+                print(f"{ext:>10} {size:>8.2f} {mode:>8} {elapsed:>8.1f} {rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+本地桩服务器基准：比较不同并发数下 scrape_url 的吞吐（页/秒）。
+
+用法: python benchmarks/bench_fetch.py --pages 200 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_details_scraper import scrape_url
+from fetch_engine import fetch_all
+from http_client import HttpClient
+from stub_server import start_stub_server
+
+
+def run(base_url, pages, concurrency, rate):
+    client = HttpClient(pool_size=concurrency)
+    urls = [f"{base_url}/app-{i}" for i in range(pages)]
+
+    start = time.monotonic()
+    ok = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _, (data, _, _) in fetch_all(
+            urls,
+            lambda url: scrape_url(client, url),
+            concurrency=concurrency,
+            rate=rate,
+        ):
+            ok += data is not None
+    elapsed = time.monotonic() - start
+    stats = client.stats()
+    client.close()
+    return ok, elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, default=None)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    print(f"页面数 {args.pages}，模拟延迟 {args.latency * 1000:.0f}ms，限速 {args.rate}")
+    print(f"{'并发':>6} {'成功':>6} {'用时(s)':>9} {'页/秒':>9} {'新建连接':>8}")
+    for concurrency in args.concurrency:
+        ok, elapsed, stats = run(base_url, args.pages, concurrency, args.rate)
+        print(
+            f"{concurrency:>6} {ok:>6} {elapsed:>9.2f} {args.pages / elapsed:>9.1f}"
+            f" {stats['new_connections']:>8}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
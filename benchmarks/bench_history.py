@@ -0,0 +1,89 @@
+"""
+历史库基准：生成多次爬取的 app_titles_*.csv（每次约 5% 的应用评论数或评分变化），
+比较 读取全部 CSV 后用 pandas 计算 与 查询历史库 得到单个应用趋势和评论增长榜的耗时。
+
+用法: python benchmarks/bench_history.py --rows 12000 --crawls 20
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from generate_dataset import generate
+from history_store import HistoryStore
+from result_writer import RESULT_FIELDS
+
+
+def write_crawls(directory, rows, crawls, seed=0):
+    rng = random.Random(seed)
+    base = generate(directory, rows, seed=seed, timestamp="20240101_000000")
+    with open(base, newline="", encoding="utf-8-sig") as f:
+        records = list(csv.DictReader(f))
+    start = datetime(2024, 1, 1)
+    for crawl in range(1, crawls):
+        for record in rng.sample(records, max(1, rows // 20)):
+            record["reviews_count"] = int(record["reviews_count"]) + rng.randint(1, 500)
+            if rng.random() < 0.2:
+                record["rating"] = round(rng.uniform(1, 5), 1)
+        timestamp = (start + timedelta(days=crawl)).strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(directory, f"app_titles_{timestamp}.csv")
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:>22}: {(time.perf_counter() - start) * 1000:>9.2f} ms")
+    return result
+
+
+def pandas_movers(directory):
+    frames = []
+    for path in sorted(os.listdir(directory)):
+        if path.startswith("app_titles_"):
+            df = pd.read_csv(os.path.join(directory, path), usecols=["url", "reviews_count"])
+            df["crawl"] = path
+            frames.append(df)
+    history = pd.concat(frames)
+    first = history.groupby("url")["reviews_count"].first()
+    last = history.groupby("url")["reviews_count"].last()
+    return (last - first).nlargest(10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--crawls", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_crawls(directory, args.rows, args.crawls)
+        print(f"{args.crawls} 次爬取，每次 {args.rows} 行")
+        url = "https://apps.shopify.com/app-7"
+
+        timed("pandas 读全部 CSV 计算榜单", lambda: pandas_movers(directory))
+
+        store = HistoryStore(os.path.join(directory, "app_history.sqlite"))
+        timed("导入历史库（一次性）", lambda: store.ingest_directory(directory) or None)
+        with store.lock:
+            rows = store.conn.execute("SELECT COUNT(*) FROM metric_history").fetchone()[0]
+        print(f"历史库共 {rows} 行（全部 CSV 共 {args.rows * args.crawls} 行）")
+        timed("历史库 单个应用趋势", lambda: store.trend(url))
+        timed("历史库 评论增长榜", lambda: store.top_movers("reviews_count"))
+        timed("历史库 7 天评论增长榜", lambda: store.top_movers("reviews_count", days=7))
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
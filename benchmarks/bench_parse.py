@@ -0,0 +1,81 @@
+"""
+解析后端基准：在保存的 HTML 样例上比较 bs4 与 lxml 的 每页解析毫秒数。
+
+用法: python benchmarks/bench_parse.py [样例目录或文件 ...] --rounds 200
+      python benchmarks/bench_parse.py --archive page_archive --limit 500  # 以爬取存档为语料
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractors import BACKENDS, parse_app_page
+from page_archive import PageArchive
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_pages(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.html"))))
+        else:
+            files.append(path)
+    pages = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            pages.append((file, f.read()))
+    return pages
+
+
+def load_archive(directory, limit=None):
+    archive = PageArchive(directory)
+    pages = []
+    for url, content, encoding in archive.iter_pages():
+        pages.append((url, content.decode(encoding or "utf-8", "replace")))
+        if limit and len(pages) >= limit:
+            break
+    archive.close()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", default=[FIXTURES_DIR])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--archive", default=None, help="使用爬取时保存的页面存档作为语料")
+    parser.add_argument("--limit", type=int, default=None, help="最多从存档读取的页面数")
+    args = parser.parse_args()
+
+    if args.archive:
+        pages = load_archive(args.archive, args.limit)
+    else:
+        pages = load_pages(args.paths)
+    if not pages:
+        print("没有找到 HTML 样例")
+        return
+
+    results = {}
+    for backend in sorted(BACKENDS):
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for file, html in pages:
+                results.setdefault(file, {})[backend] = parse_app_page(
+                    file, html, backend=backend
+                )
+        elapsed = time.perf_counter() - start
+        per_page = elapsed * 1000 / (args.rounds * len(pages))
+        print(f"{backend:>6}: {per_page:.3f} ms/页")
+
+    mismatched = [f for f, r in results.items() if len(set(map(repr, r.values()))) > 1]
+    print(f"样例 {len(pages)} 个，结果不一致 {len(mismatched)} 个")
+    for file in mismatched:
+        print(f"  不一致: {file}")
+
+
+if __name__ == "__main__":
+    main()
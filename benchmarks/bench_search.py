@@ -0,0 +1,48 @@
+"""
+全文检索基准：统计索引构建时间和 top-k 查询延迟。
+
+用法: python benchmarks/bench_search.py --rows 12000 --top-k 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "api"))
+
+import pandas as pd
+
+from generate_dataset import generate
+from search_index import FullTextIndex
+
+QUERIES = ["营销", "seo email", "订阅 会员", "shipping 物流", "库存管理", "chat 客服", "loyalty"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        records = pd.read_csv(generate(directory, args.rows)).to_dict("records")
+
+    start = time.perf_counter()
+    index = FullTextIndex(records)
+    print(f"{args.rows} 条记录，索引构建 {time.perf_counter() - start:.2f} 秒，词项 {len(index.postings)} 个")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            total, top = index.search(query, top_k=args.top_k)
+        elapsed = (time.perf_counter() - start) * 1000 / args.rounds
+        best = records[top[0][0]]["title"] if top else "-"
+        print(f"{query:>14}: {elapsed:>7.2f} ms  命中 {total:>6}  第一名 {best}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+worker 数与吞吐的基准：在本地生成的数据集上分别以不同 worker 数启动 api/serve.py，
+用多个客户端进程并发请求 /api/apps/search，输出 请求/秒、延迟分位数，
+以及所有 worker 的 RSS 之和与 PSS 之和（PSS 把共享页按进程数均摊，
+两者差距越大说明预加载的数据集共享得越多）。
+
+用法: python benchmarks/bench_workers.py --rows 12000 --workers 1 2 4 --clients 8 --seconds 5
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+from generate_dataset import generate
+
+TERMS = ["", "shop", "seo", "营销", "review", "bundle 物流", "Chat"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/api/apps/search?per_page=1")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("服务启动超时")
+
+
+def client(port, seconds, seed, results):
+    rng = random.Random(seed)
+    latencies = []
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        query = {"q": rng.choice(TERMS), "page": rng.randint(1, 20), "per_page": 20}
+        start = time.perf_counter()
+        conn.request("GET", "/api/apps/search?" + urlencode(query))
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        if response.getheader("Connection", "").lower() == "close":
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.close()
+    results.put(latencies)
+
+
+def worker_pids(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+def memory_kb(pid, field):
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(directory, workers, args):
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            os.path.join(ROOT, "api", "serve.py"),
+            "--port", str(port),
+            "--workers", str(workers),
+            "--threads", str(args.threads),
+            "--data-dir", directory,
+            "--server", args.server,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(port)
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client, args=(port, args.seconds, i, results))
+            for i in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        latencies = []
+        for _ in clients:
+            latencies.extend(results.get())
+        for process in clients:
+            process.join()
+
+        pids = worker_pids(server.pid) or [server.pid]
+        rss = sum(memory_kb(pid, "Rss") for pid in pids) / 1024
+        pss = sum(memory_kb(pid, "Pss") for pid in pids) / 1024
+        print(
+            f"{workers:>3} worker: {len(latencies) / args.seconds:>8.1f} 请求/秒  "
+            f"p50 {percentile(latencies, 50) * 1000:.2f}ms  "
+            f"p99 {percentile(latencies, 99) * 1000:.2f}ms  "
+            f"RSS 合计 {rss:.0f}MB  PSS 合计 {pss:.0f}MB"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--server", default="auto")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate(directory, args.rows)
+        print(f"数据集 {args.rows} 行，{args.clients} 个客户端进程，每轮 {args.seconds:g} 秒")
+        for workers in args.workers:
+            run(directory, workers, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+生成本地测试用的 app_titles_*.csv 数据集。
+
+用法: python benchmarks/generate_dataset.py --rows 12000 --output /tmp/apps
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_writer import RESULT_FIELDS
+
+WORDS = [
+    "Shop", "Review", "SEO", "Email", "Upsell", "Bundle", "Loyalty", "Chat",
+    "Shipping", "Inventory", "Analytics", "Pop", "Subscription", "Wishlist",
+    "Translate", "Currency", "Form", "Label", "Print", "Order",
+]
+CN_WORDS = ["营销", "评论", "物流", "库存", "会员", "订阅", "翻译", "客服", "促销", "分析"]
+CATEGORIES = ["营销", "销售", "客户服务", "店铺设计", "订单和物流", "库存管理", "数据分析"]
+
+
+def make_row(i, rng):
+    title = " ".join(rng.sample(WORDS, 2)) + " " + rng.choice(CN_WORDS) + f" {i}"
+    return {
+        "url": f"https://apps.shopify.com/app-{i}",
+        "title": title,
+        "rating": round(rng.uniform(1, 5), 1),
+        "reviews_count": rng.randint(0, 20000),
+        "main_description": f"{title}，帮助商家提升{rng.choice(CN_WORDS)}效率",
+        "detailed_description": "".join(rng.choices(CN_WORDS, k=40)),
+        "detail_points": "|".join(rng.choices(CN_WORDS, k=3)),
+        "category": "|".join(rng.sample(CATEGORIES, 2)),
+        "release_date": f"20{rng.randint(15, 24)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "website": f"https://example.com/{i}",
+        "complete_information": True,
+        "locale": "zh-CN",
+    }
+
+
+def generate(directory, rows, seed=0, timestamp="20240101_000000"):
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"app_titles_{timestamp}.csv")
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        for i in range(rows):
+            writer.writerow(make_row(i, rng))
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=12000)
+    parser.add_argument("--output", default=".")
+    args = parser.parse_args()
+    print(f"已生成: {generate(args.output, args.rows)}")
+
+
+if __name__ == "__main__":
+    main()
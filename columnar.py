@@ -0,0 +1,166 @@
+import csv
+import os
+from datetime import date
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def app_schema():
+    """应用详情的固定列式 schema：数值评分/评论数、日期类型发布日期、列表类型详细点和类目"""
+    return pa.schema(
+        [
+            ("url", pa.string()),
+            ("title", pa.string()),
+            ("rating", pa.float64()),
+            ("reviews_count", pa.int64()),
+            ("main_description", pa.string()),
+            ("detailed_description", pa.string()),
+            ("detail_points", pa.list_(pa.string())),
+            ("category", pa.list_(pa.string())),
+            ("release_date", pa.date32()),
+            ("website", pa.string()),
+            ("complete_information", pa.bool_()),
+            ("locale", pa.string()),
+        ]
+    )
+
+
+def _text(value):
+    return value if value not in (None, "") else None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(float(str(value).replace(",", "")))
+    except (TypeError, ValueError):
+        return None
+
+
+def _list(value):
+    return value.split("|") if value not in (None, "") else None
+
+
+def _date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    return None if value in (None, "") else str(value) == "True"
+
+
+CONVERTERS = {
+    "url": _text,
+    "title": _text,
+    "rating": _float,
+    "reviews_count": _int,
+    "main_description": _text,
+    "detailed_description": _text,
+    "detail_points": _list,
+    "category": _list,
+    "release_date": _date,
+    "website": _text,
+    "complete_information": _bool,
+    "locale": _text,
+}
+
+
+def typed_batch(rows, schema):
+    """把 CSV 中的字符串行转换为 schema 对应类型的 RecordBatch"""
+    columns = {name: [] for name in schema.names}
+    for row in rows:
+        for name in schema.names:
+            columns[name].append(CONVERTERS[name](row.get(name)))
+    return pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+class ColumnarWriter:
+    """
+    分批写入带类型的 .parquet 或 .arrow 文件，记录可以是 CSV 行或爬取得到的记录字典。
+    先写临时文件，close 时再改名，读取方不会看到写了一半的文件。
+    """
+
+    def __init__(self, output_path, fmt="arrow", batch_size=5000):
+        if not HAS_PYARROW:
+            raise RuntimeError("列式输出需要安装 pyarrow")
+        self.path = output_path
+        self.temp_path = output_path + ".tmp"
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.schema = app_schema()
+        self.batch = []
+        self.rows = 0
+        if fmt == "parquet":
+            self.sink = None
+            self.writer = pq.ParquetWriter(self.temp_path, self.schema, compression="zstd")
+        else:
+            self.sink = pa.OSFile(self.temp_path, "wb")
+            self.writer = pa.ipc.new_file(self.sink, self.schema)
+
+    def write(self, row):
+        self.batch.append(row)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.batch:
+            self.writer.write_batch(typed_batch(self.batch, self.schema))
+            self.rows += len(self.batch)
+            self.batch = []
+
+    def close(self, finished=True):
+        """finished 为 False 时丢弃临时文件"""
+        self.flush()
+        if not self.rows and finished:
+            self.writer.write_batch(typed_batch([], self.schema))
+        self.writer.close()
+        if self.sink is not None:
+            self.sink.close()
+        if finished:
+            os.replace(self.temp_path, self.path)
+        else:
+            os.remove(self.temp_path)
+
+
+def columnar_path(csv_path, fmt):
+    return os.path.splitext(csv_path)[0] + COLUMNAR_FORMATS[fmt]
+
+
+def csv_to_columnar(csv_path, fmt="arrow", batch_size=5000):
+    """
+    分批把 app_titles_*.csv 转换为同名的 .parquet 或 .arrow（Arrow IPC 文件，可内存映射），
+    内存占用只与 batch_size 有关。
+    """
+    writer = ColumnarWriter(columnar_path(csv_path, fmt), fmt, batch_size)
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            writer.write(row)
+    writer.close()
+    return writer.path, writer.rows
+
+
+def read_columnar(path):
+    """读取列式文件为 pyarrow.Table，Arrow IPC 文件通过内存映射零拷贝读取"""
+    if path.endswith(".parquet"):
+        return pq.read_table(path, memory_map=True)
+    source = pa.memory_map(path, "r")
+    return pa.ipc.open_file(source).read_all()
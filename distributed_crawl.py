@@ -0,0 +1,280 @@
+"""
+分布式爬取：协调者把应用链接按 handle 的一致性哈希分片写入租约队列，
+多台机器上的 worker 各自领取分片、抓取并写出分片结果，最后合并为 app_titles_<任务>.csv。
+
+用法:
+    python distributed_crawl.py coordinator --shards 32 [--from-sitemap]
+    python distributed_crawl.py worker --concurrency 16 --rate 8     # 每台机器运行一个或多个
+    python distributed_crawl.py status
+    python distributed_crawl.py merge [--columnar arrow]
+
+多台机器时 --queue 和 --output-dir 需要指向共享存储。
+"""
+import argparse
+import csv
+import os
+import re
+import socket
+import threading
+import time
+
+import pandas as pd
+
+from app_details_scraper import give_up, load_app_urls, scrape_url
+from columnar import COLUMNAR_FORMATS, csv_to_columnar
+from extractors import BACKENDS, DEFAULT_BACKEND
+from fetch_engine import fetch_all
+from history_store import HistoryStore
+from http_client import HttpClient
+from publish import publish_dataset
+from result_writer import ERROR_FIELDS, RESULT_FIELDS
+from retry_scheduler import AimdController, RetryPolicy
+from shard_queue import ShardQueue
+
+# worker 默认限速，与单机爬取默认的 1 / delay 相同；多个 worker 时总速率按 worker 数叠加
+DEFAULT_RATE = 2.0
+
+
+def shard_paths(output_dir, job_id, shard):
+    directory = os.path.join(output_dir, f"shards_{job_id}")
+    base = os.path.join(directory, f"shard_{shard:04d}")
+    return directory, base + ".csv", base + "_errors.csv"
+
+
+def coordinate(queue, shards, from_sitemap=False):
+    """列出所有应用链接并分片登记为一个新任务，返回任务号"""
+    urls = list(load_app_urls(from_sitemap)[0])
+
+    job_id = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+    counts = queue.create_job(job_id, urls, shards)
+    print(
+        f"任务 {job_id}: {len(urls)} 个URL，{shards} 个分片，"
+        f"每片 {min(counts)}~{max(counts)} 个"
+    )
+    return job_id
+
+
+class LeaseKeeper(threading.Thread):
+    """处理分片期间定期续约；续约失败说明租约已被其他 worker 接手"""
+
+    def __init__(self, queue, job_id, shard, worker):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.job_id = job_id
+        self.shard = shard
+        self.worker = worker
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self.stopped.wait(interval):
+            if not self.queue.renew(self.job_id, self.shard, self.worker):
+                self.lost = True
+                print(f"分片 {self.shard} 的租约已失效")
+                return
+
+    def stop(self):
+        self.stopped.set()
+
+
+def crawl_shard(client, urls, results_path, errors_path, concurrency, rate, parser):
+    """抓取一个分片并写出分片结果（调用方传入本 worker 专用的临时文件路径）"""
+    retry = RetryPolicy(base_delay=max(1.0, 2 / rate) if rate else 1.0)
+    controller = AimdController(max_limit=concurrency)
+
+    def worker(url):
+        return scrape_url(client, url, parser=parser)
+
+    rows = failed = 0
+    with open(results_path, "w", newline="", encoding="utf-8-sig") as results_file, open(
+        errors_path, "w", newline="", encoding="utf-8-sig"
+    ) as errors_file:
+        results = csv.DictWriter(results_file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        errors = csv.DictWriter(errors_file, fieldnames=ERROR_FIELDS, extrasaction="ignore")
+        results.writeheader()
+        errors.writeheader()
+        for url, (data, url_errors, status) in fetch_all(
+            urls,
+            worker,
+            concurrency=concurrency,
+            rate=rate,
+            retry=retry,
+            controller=controller,
+            give_up=give_up,
+        ):
+            if data:
+                results.writerow(data)
+                rows += 1
+            else:
+                failed += 1
+            errors.writerows(url_errors)
+    return rows, failed
+
+
+def work(
+    queue, job_id, output_dir=".", concurrency=8, rate=DEFAULT_RATE, parser=None, poll=5.0
+):
+    """
+    循环领取并处理分片，直到任务的所有分片完成。
+    其他 worker 持有的分片还没完成时继续等待，它们的租约过期后会被这里重新领取。
+    """
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    temp_tag = re.sub(r"[^\w.-]", "_", worker_id)
+    client = HttpClient(pool_size=concurrency)
+    processed = 0
+    try:
+        while True:
+            shard = queue.claim(job_id, worker_id)
+            if shard is None:
+                status = queue.status(job_id)
+                if not status.get("pending") and not status.get("leased"):
+                    break
+                time.sleep(poll)
+                continue
+
+            urls = queue.urls(job_id, shard)
+            directory, results_path, errors_path = shard_paths(output_dir, job_id, shard)
+            os.makedirs(directory, exist_ok=True)
+            # 分片被重新领取时原 worker 可能仍在写，临时文件按 worker 区分，互不覆盖
+            results_temp = f"{results_path}.{temp_tag}.tmp"
+            errors_temp = f"{errors_path}.{temp_tag}.tmp"
+            print(f"[{worker_id}] 开始处理分片 {shard}（{len(urls)} 个URL）")
+
+            keeper = LeaseKeeper(queue, job_id, shard, worker_id)
+            keeper.start()
+            start = time.monotonic()
+            try:
+                rows, failed = crawl_shard(
+                    client, urls, results_temp, errors_temp, concurrency, rate, parser
+                )
+            finally:
+                keeper.stop()
+
+            if keeper.lost or not queue.renew(job_id, shard, worker_id):
+                # 租约已被接手，这份结果作废，以新 worker 的结果为准，只删除自己的临时文件
+                os.remove(results_temp)
+                os.remove(errors_temp)
+                print(f"[{worker_id}] 分片 {shard} 已由其他 worker 接手，丢弃本地结果")
+                continue
+            # 先把结果改名到位再标记完成，中途退出时分片仍是 leased，租约过期后会被重新领取
+            os.replace(results_temp, results_path)
+            os.replace(errors_temp, errors_path)
+            if not queue.complete(job_id, shard, worker_id, results_path):
+                # 改名后租约才被接手：文件是完整结果，之后由接手的 worker 覆盖并标记完成
+                print(f"[{worker_id}] 分片 {shard} 已由其他 worker 接手，以其结果为准")
+                continue
+            processed += 1
+            print(
+                f"[{worker_id}] 分片 {shard} 完成: 成功 {rows}，失败 {failed}，"
+                f"用时 {time.monotonic() - start:.1f} 秒"
+            )
+    finally:
+        client.print_stats()
+        client.close()
+    print(f"[{worker_id}] 没有剩余分片，共处理 {processed} 个分片")
+
+
+def concat_csv(paths, output_path, fieldnames):
+    temp_path = output_path + ".tmp"
+    rows = 0
+    with open(temp_path, "w", newline="", encoding="utf-8-sig") as out:
+        writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for path in paths:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                for row in csv.DictReader(f):
+                    writer.writerow(row)
+                    rows += 1
+    os.replace(temp_path, output_path)
+    return rows
+
+
+def merge(
+    queue, job_id, output_dir=".", columnar=None, history_db="app_history.sqlite", publish=False
+):
+    """
+    所有分片完成后合并为 app_titles_<任务>.csv 和 scraping_errors_<任务>.csv，
+    publish 为 True 时把合并结果发布为 API 使用的最新数据集。
+    """
+    status = queue.status(job_id)
+    if status.get("pending") or status.get("leased"):
+        print(f"任务 {job_id} 还有未完成的分片: {status}")
+        return None
+
+    outputs = [path for _, path in queue.outputs(job_id)]
+    results_path = os.path.join(output_dir, f"app_titles_{job_id}.csv")
+    errors_path = os.path.join(output_dir, f"scraping_errors_{job_id}.csv")
+    rows = concat_csv(outputs, results_path, RESULT_FIELDS)
+    errors = concat_csv(
+        [path[: -len(".csv")] + "_errors.csv" for path in outputs], errors_path, ERROR_FIELDS
+    )
+    print(f"已合并 {len(outputs)} 个分片: {results_path}（{rows} 条记录，{errors} 条错误）")
+
+    output_path = results_path
+    if columnar:
+        output_path, _ = csv_to_columnar(results_path, columnar)
+        print(f"列式文件已保存到: {output_path}")
+    if history_db:
+        history = HistoryStore(history_db)
+        ingested, changed = history.ingest_csv(results_path)
+        history.close()
+        print(f"历史库 {history_db}: 导入 {ingested} 条记录，{changed} 个应用有变化")
+    if publish:
+        publish_dataset(output_path, rows=rows, timestamp=job_id)
+    return results_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片分布式爬取应用详情")
+    parser.add_argument("--queue", default="crawl_shards.sqlite", help="分片队列数据库路径")
+    parser.add_argument("--job", default=None, help="任务号，默认最近创建的任务")
+    parser.add_argument("--output-dir", default=".", help="分片结果和合并结果的目录")
+    parser.add_argument("--lease", type=float, default=300, help="分片租约时长（秒）")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator = commands.add_parser("coordinator", help="列出应用链接并分片")
+    coordinator.add_argument("--shards", type=int, default=32)
+    coordinator.add_argument("--from-sitemap", action="store_true")
+
+    worker = commands.add_parser("worker", help="领取并处理分片")
+    worker.add_argument("--concurrency", type=int, default=8)
+    worker.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help=f"每个 worker 每秒最多请求数，默认 {DEFAULT_RATE}（与单机爬取的默认间隔 0.5 秒一致）",
+    )
+    worker.add_argument("--parser", choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+
+    commands.add_parser("status", help="查看分片状态")
+
+    merger = commands.add_parser("merge", help="合并分片结果")
+    merger.add_argument("--columnar", choices=sorted(COLUMNAR_FORMATS), default=None)
+    merger.add_argument("--history-db", default="app_history.sqlite")
+    merger.add_argument("--publish", action="store_true", help="发布为 API 使用的最新数据集")
+    args = parser.parse_args()
+
+    queue = ShardQueue(args.queue, lease_seconds=args.lease)
+    try:
+        if args.command == "coordinator":
+            coordinate(queue, args.shards, args.from_sitemap)
+            return
+        job_id = args.job or queue.latest_job()
+        if job_id is None:
+            print("队列中没有任务，请先运行 coordinator")
+            return
+        if args.command == "worker":
+            work(queue, job_id, args.output_dir, args.concurrency, args.rate, args.parser)
+        elif args.command == "status":
+            print(f"任务 {job_id}: {queue.status(job_id)}")
+        else:
+            merge(
+                queue, job_id, args.output_dir, args.columnar, args.history_db, args.publish
+            )
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+import re
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+# 字段 → 选择器规则表：(字段名, 标签, 完整 class 字符串, 是否取全部匹配)
+FIELD_RULES = [
+    (
+        "incomplete_information",
+        "div",
+        "banner tw-bg-canvas-accent-orange tw-border-stroke-accent-orange tw-text-fg-accent-orange tw-py-4 lg:tw-py-8",
+        False,
+    ),
+    (
+        "title",
+        "h1",
+        "tw-text-heading-lg tw-whitespace-normal tw-hyphens tw-text-balance -tw-my-xs",
+        False,
+    ),
+    (
+        "rating_section",
+        "dd",
+        "tw-flex tw-items-center tw-gap-2xs tw-text-body-sm",
+        False,
+    ),
+    ("main_description", "h2", "tw-text-heading-lg tw-text-pretty", False),
+    (
+        "detailed_description",
+        "p",
+        "tw-hidden lg:tw-block tw-text-body-md tw-text-fg-secondary",
+        False,
+    ),
+    (
+        "detail_points",
+        "li",
+        "tw-text-body-md tw-text-fg-secondary tw-mb-xs",
+        True,
+    ),
+    ("category", "div", "tw-flex tw-justify-between tw-mb-xl", True),
+    (
+        "release_date",
+        "p",
+        "tw-col-span-full sm:tw-col-span-3 tw-text-fg-secondary tw-text-body-md",
+        False,
+    ),
+]
+
+# 官网链接按链接文字匹配
+WEBSITE_TEXT = "网站"
+
+
+def parse_cjk_date(text):
+    # 将中文/日文年月日替换为标准格式，例如 2021年1月5日
+    text = text.replace("年", "-").replace("月", "-").replace("日", "")
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def parse_en_date(text):
+    # 例如 January 5, 2021 或 Jan 5, 2021
+    for fmt in ("%B %d, %Y", "%b %d, %Y"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    raise ValueError(f"无法解析日期: {text}")
+
+
+GERMAN_MONTHS = {
+    "januar": 1, "jänner": 1, "februar": 2, "märz": 3, "april": 4, "mai": 5, "juni": 6,
+    "juli": 7, "august": 8, "september": 9, "oktober": 10, "november": 11, "dezember": 12,
+}
+GERMAN_DATE_RE = re.compile(r"(\d{1,2})\.\s*(\S+)\s+(\d{4})")
+
+
+def parse_de_date(text):
+    # 例如 5. Januar 2021
+    match = GERMAN_DATE_RE.match(text)
+    month = GERMAN_MONTHS.get(match.group(2).lower()) if match else None
+    if not month:
+        raise ValueError(f"无法解析日期: {text}")
+    return datetime(int(match.group(3)), month, int(match.group(1)))
+
+
+# 各语言页面上依赖文字的规则：官网链接文字、日期格式、数字的小数点和千位分隔符。
+# 选择器规则（FIELD_RULES）与语言无关，所有语言共用。
+LOCALE_RULES = {
+    "zh-CN": {
+        "website_text": WEBSITE_TEXT,
+        "parse_date": parse_cjk_date,
+        "decimal": ".",
+        "thousands": ",",
+    },
+    "en": {
+        "website_text": "Website",
+        "parse_date": parse_en_date,
+        "decimal": ".",
+        "thousands": ",",
+    },
+    "ja": {
+        "website_text": "ウェブサイト",
+        "parse_date": parse_cjk_date,
+        "decimal": ".",
+        "thousands": ",",
+    },
+    "de": {
+        "website_text": "Website",
+        "parse_date": parse_de_date,
+        "decimal": ",",
+        "thousands": ".",
+    },
+}
+DEFAULT_LOCALE = "zh-CN"
+
+
+def locale_url(url, locale):
+    """给应用链接加上（或替换）locale 参数"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "locale"]
+    query.append(("locale", locale))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def app_key(url):
+    """应用的语言无关标识：不带 locale 参数的链接，历史库和重爬调度按它关联同一应用"""
+    return split_locale(url)[0]
+
+
+def split_locale(url):
+    """拆出 locale 参数，返回 (不带 locale 的应用链接, 语言)；没有参数时为默认语言"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query)
+    locale = DEFAULT_LOCALE
+    rest = []
+    for key, value in query:
+        if key == "locale":
+            locale = value
+        else:
+            rest.append((key, value))
+    return urlunsplit(parts._replace(query=urlencode(rest))), locale
+
+
+class SoupNodes:
+    """BeautifulSoup 节点操作（后备解析器）"""
+
+    @staticmethod
+    def text(node):
+        return node.text
+
+    @staticmethod
+    def find_all(node, tag):
+        return node.find_all(tag)
+
+    @staticmethod
+    def find(node, tag):
+        return node.find(tag)
+
+    @staticmethod
+    def attr(node, name):
+        return node[name]
+
+
+class LxmlNodes:
+    """lxml 节点操作"""
+
+    @staticmethod
+    def text(node):
+        return node.text_content()
+
+    @staticmethod
+    def find_all(node, tag):
+        return [el for el in node.iter(tag) if el is not node]
+
+    @staticmethod
+    def find(node, tag):
+        for el in node.iter(tag):
+            if el is not node:
+                return el
+        return None
+
+    @staticmethod
+    def attr(node, name):
+        return node.attrib[name]
+
+
+def match_with_bs4(html, website_text=WEBSITE_TEXT):
+    """逐条规则调用 soup.find / find_all"""
+    soup = BeautifulSoup(html, "html.parser")
+    matches = {}
+    for field, tag, class_name, multiple in FIELD_RULES:
+        if multiple:
+            matches[field] = soup.find_all(tag, {"class": class_name})
+        else:
+            node = soup.find(tag, {"class": class_name})
+            matches[field] = [node] if node else []
+    website = soup.find("a", string=website_text)
+    matches["website"] = [website] if website else []
+    return matches
+
+
+def single_string(el):
+    """
+    与 bs4 的 tag.string 相同：没有子元素时取文本，只有一个子元素且前后没有文本时
+    递归取子元素的文本，否则为 None。例如 <a><span>网站</span></a> 的结果为 "网站"。
+    """
+    while len(el):
+        if len(el) > 1 or el.text or el[0].tail:
+            return None
+        el = el[0]
+    return el.text
+
+
+def match_with_lxml(html, website_text=WEBSITE_TEXT):
+    """只遍历一次文档树，按 (标签, class) 查表收集所有字段的节点"""
+    rules = {}
+    matches = {"website": []}
+    for field, tag, class_name, multiple in FIELD_RULES:
+        rules.setdefault(tag, {}).setdefault(class_name, []).append(
+            (field, multiple)
+        )
+        matches[field] = []
+
+    try:
+        root = lxml.html.document_fromstring(html)
+    except lxml.etree.ParserError:
+        # 空文档，所有字段都按未找到处理
+        return matches
+
+    for el in root.iter():
+        tag = el.tag
+        if tag == "a" and not matches["website"]:
+            if single_string(el) == website_text:
+                matches["website"].append(el)
+        by_class = rules.get(tag)
+        if by_class is None:
+            continue
+        class_attr = el.get("class")
+        if class_attr is None:
+            continue
+        fields = by_class.get(class_attr) or by_class.get(" ".join(class_attr.split()))
+        if not fields:
+            continue
+        for field, multiple in fields:
+            if multiple or not matches[field]:
+                matches[field].append(el)
+    return matches
+
+
+BACKENDS = {
+    "bs4": (match_with_bs4, SoupNodes),
+    "lxml": (match_with_lxml, LxmlNodes),
+}
+
+DEFAULT_BACKEND = "lxml" if HAS_LXML else "bs4"
+
+
+def build_record(url, matches, nodes, locale=DEFAULT_LOCALE):
+    """根据匹配到的节点生成记录，返回 (data, field_errors, incomplete_information)"""
+    field_errors = []  # 记录每个字段的错误
+    rules = LOCALE_RULES.get(locale, LOCALE_RULES[DEFAULT_LOCALE])
+
+    def first(field):
+        found = matches.get(field)
+        return found[0] if found else None
+
+    data = {
+        "url": url,
+        "title": None,
+        "rating": None,
+        "reviews_count": None,
+        "main_description": None,
+        "detailed_description": None,
+        "detail_points": None,
+        "category": None,
+        "release_date": None,
+        "website": None,  # 新增官网字段
+        "complete_information": True,
+        "locale": locale,
+    }
+
+    incomplete_information = first("incomplete_information") is not None
+    data["complete_information"] = not incomplete_information
+
+    if not data["complete_information"]:
+        return data, field_errors, incomplete_information
+
+    # 获取标题
+    try:
+        title = first("title")
+        data["title"] = nodes.text(title).strip() if title is not None else None
+        if not data["title"]:
+            field_errors.append({"field": "title", "error": "标题未找到"})
+    except Exception as e:
+        field_errors.append({"field": "title", "error": str(e)})
+
+    # 获取评分和评论
+    try:
+        rating_section = first("rating_section")
+        if rating_section is not None:
+            spans = nodes.find_all(rating_section, "span")
+            rating_span = spans[0] if spans else None
+            data["rating"] = (
+                nodes.text(rating_span).strip().replace(rules["decimal"], ".")
+                if rating_span is not None
+                else None
+            )
+            if not data["rating"]:
+                field_errors.append({"field": "rating", "error": "评分未找到"})
+            try:
+                review_link = spans[2]
+                if nodes.find(review_link, "a") is not None:
+                    reviews_text = nodes.text(review_link).strip()
+                    data["reviews_count"] = (
+                        reviews_text.strip("()").replace(rules["thousands"], "").strip()
+                    )
+                else:
+                    data["reviews_count"] = 0
+            except Exception as e:
+                field_errors.append({"field": "reviews_count", "error": str(e)})
+    except Exception as e:
+        field_errors.append({"field": "rating_section", "error": str(e)})
+
+    # 获取主要描述
+    try:
+        main_desc = first("main_description")
+        data["main_description"] = (
+            nodes.text(main_desc).strip() if main_desc is not None else None
+        )
+        if not data["main_description"]:
+            field_errors.append(
+                {"field": "main_description", "error": "主要描述未找到"}
+            )
+    except Exception as e:
+        field_errors.append({"field": "main_description", "error": str(e)})
+
+    # 获取详细描述
+    try:
+        detailed_desc = first("detailed_description")
+        data["detailed_description"] = (
+            nodes.text(detailed_desc).strip() if detailed_desc is not None else None
+        )
+        if not data["detailed_description"]:
+            field_errors.append(
+                {"field": "detailed_description", "error": "详细描述未找到"}
+            )
+    except Exception as e:
+        field_errors.append({"field": "detailed_description", "error": str(e)})
+
+    # 获取详细点
+    try:
+        detail_elements = matches.get("detail_points")
+        if detail_elements:
+            data["detail_points"] = "|".join(
+                [nodes.text(element).strip() for element in detail_elements]
+            )
+        else:
+            field_errors.append(
+                {"field": "detail_points", "error": "详细点列表未找到"}
+            )
+    except Exception as e:
+        field_errors.append({"field": "detail_points", "error": str(e)})
+
+    # 获取分类
+    try:
+        category_divs = matches.get("category")
+        if category_divs:
+            categories = []
+            for div in category_divs:
+                a_tags = nodes.find_all(div, "a")
+                if a_tags:
+                    categories.extend([nodes.text(a).strip() for a in a_tags])
+            data["category"] = "|".join(categories) if categories else None
+        else:
+            field_errors.append({"field": "category", "error": "类目未找到"})
+    except Exception as e:
+        field_errors.append({"field": "category", "error": str(e)})
+
+    # 获取发布日期
+    try:
+        release_date = first("release_date")
+        if release_date is not None:
+            # 分割文本并只保留日期部分
+            date_text = nodes.text(release_date).split("·")[0].strip()
+            # 按页面语言解析为日期对象，再格式化为 YYYY-MM-DD 格式
+            date_obj = rules["parse_date"](date_text)
+            data["release_date"] = date_obj.strftime("%Y-%m-%d")
+        else:
+            field_errors.append({"field": "release_date", "error": "发布日期没找到"})
+    except Exception as e:
+        field_errors.append({"field": "release_date", "error": str(e)})
+
+    # 获取官网
+    try:
+        website_link = first("website")
+        data["website"] = (
+            nodes.attr(website_link, "href") if website_link is not None else None
+        )
+    except Exception:
+        pass  # 如果没有找到网站链接，静默失败
+
+    return data, field_errors, incomplete_information
+
+
+def parse_app_page(url, html, backend=None):
+    """
+    解析应用详情页，返回 (data, field_errors, incomplete_information)。
+    url 中的 locale 参数决定使用哪种语言的规则；记录中的 url 保持抓取时的链接，
+    与只爬一种语言时的输出一致，语言另记在 locale 列。
+    """
+    match, nodes = BACKENDS[backend or DEFAULT_BACKEND]
+    locale = split_locale(url)[1]
+    rules = LOCALE_RULES.get(locale, LOCALE_RULES[DEFAULT_LOCALE])
+    return build_record(url, match(html, rules["website_text"]), nodes, locale)
@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+from retry_scheduler import RetryableError
+
+
+class TokenBucket:
+    """令牌桶限速器，rate 为每秒令牌数，capacity 为允许的突发量"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """按域名分别维护令牌桶，保证对同一主机的请求速率不超过 rate"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self.buckets[host] = bucket
+        bucket.acquire()
+
+
+def fetch_all(
+    urls,
+    worker,
+    concurrency=8,
+    rate=None,
+    burst=None,
+    retry=None,
+    controller=None,
+    give_up=None,
+    metrics=None,
+    log=None,
+):
+    """
+    并发执行 worker(url)，按完成顺序产出 (url, result)。
+    rate 为每个主机每秒最多请求数，None 表示不限速。
+
+    worker 抛出 RetryableError 时，按 retry（RetryPolicy）的退避时间把 URL 放入延迟队列，
+    到期后重新执行；重试次数用完后产出 give_up(url, error) 的结果。
+    controller（AimdController）根据成功和限流情况动态调整同时执行的任务数。
+    metrics（telemetry.Metrics）记录执行中的任务数和重试队列长度。
+    log 为逐条日志函数（如 app_details_scraper.log），为 None 时不输出每次重试。
+    """
+    limiter = HostRateLimiter(rate, burst if burst else concurrency)
+    max_retries = retry.max_retries if retry else 0
+
+    def run(url):
+        limiter.acquire(url)
+        return worker(url)
+
+    def limit():
+        # 未启用自适应控制时最多同时提交 2 * concurrency 个任务，保持线程繁忙
+        return controller.limit() if controller else concurrency * 2
+
+    # 已完成的结果产出后即释放，内存不随 URL 数增长
+    url_iter = iter(urls)
+    exhausted = False
+    delayed = []  # (到期时间, 序号, url, 已重试次数)
+    sequence = itertools.count()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        pending = {}
+        while True:
+            now = time.monotonic()
+            while len(pending) < limit():
+                if delayed and delayed[0][0] <= now:
+                    _, _, url, attempt = heapq.heappop(delayed)
+                elif not exhausted:
+                    url = next(url_iter, None)
+                    if url is None:
+                        exhausted = True
+                        continue
+                    attempt = 0
+                else:
+                    break
+                pending[executor.submit(run, url)] = (url, attempt, time.monotonic())
+
+            if metrics:
+                metrics.set("inflight", len(pending))
+                metrics.set("retry_queue", len(delayed))
+            if not pending and not delayed and exhausted:
+                break
+
+            # 等到有任务完成、延迟队列到期或熔断结束
+            wake_times = [delayed[0][0]] if delayed else []
+            if controller and controller.limit() == 0:
+                wake_times.append(controller.reopen_at())
+            timeout = max(0.0, min(wake_times) - now) if wake_times else None
+            if not pending:
+                time.sleep(timeout if timeout is not None else 0.1)
+                continue
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, attempt, started = pending.pop(future)
+                try:
+                    result = future.result()
+                except RetryableError as e:
+                    if controller:
+                        controller.on_failure(e, started)
+                    if metrics:
+                        metrics.inc("retryable_errors", status=str(e.status_code or "network"))
+                    if attempt < max_retries:
+                        delay = retry.delay(attempt, e.retry_after)
+                        if log:
+                            log(f"{url} 将在 {delay:.1f} 秒后重试 ({attempt + 1}/{max_retries}): {e}")
+                        heapq.heappush(
+                            delayed,
+                            (time.monotonic() + delay, next(sequence), url, attempt + 1),
+                        )
+                        continue
+                    if give_up is None:
+                        raise
+                    result = give_up(url, e)
+                else:
+                    if controller:
+                        controller.on_success(started)
+                yield url, result
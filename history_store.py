@@ -0,0 +1,362 @@
+"""
+评分和评论数的历史库：每次爬取结束后导入 app_titles_*.csv，
+只在某个应用的评分或评论数与上一次不同时追加一行（url + 爬取时间为主键）。
+url 为不带 locale 参数的应用链接，与爬取时使用的语言无关。
+
+用法: python history_store.py --ingest .   # 导入目录下尚未导入的历史 CSV
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from columnar import CONVERTERS
+from extractors import app_key
+
+METRICS = ("rating", "reviews_count")
+TIMESTAMP_RE = re.compile(r"app_titles_(\d{8}_\d{6})")
+
+
+def crawl_time_from_path(path):
+    """从 app_titles_YYYYMMDD_HHMMSS.csv 中取出爬取时间（ISO 格式，可按字符串排序）"""
+    match = TIMESTAMP_RE.search(os.path.basename(path))
+    if not match:
+        raise ValueError(f"无法从文件名中识别爬取时间: {path}")
+    return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").isoformat()
+
+
+class HistoryStore:
+    """
+    metric_history 为只追加的变化记录，latest 保存每个应用当前的值，
+    导入时只需和 latest 比较，不需要回读历史。
+    """
+
+    def __init__(self, path="app_history.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crawls (
+                crawl_time TEXT PRIMARY KEY,
+                source TEXT,
+                rows INTEGER,
+                changed INTEGER,
+                ingested_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS metric_history (
+                url TEXT NOT NULL,
+                crawl_time TEXT NOT NULL,
+                rating REAL,
+                reviews_count INTEGER,
+                PRIMARY KEY (url, crawl_time)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS latest (
+                url TEXT PRIMARY KEY,
+                crawl_time TEXT NOT NULL,
+                rating REAL,
+                reviews_count INTEGER
+            ) WITHOUT ROWID;
+            -- 边爬边导入时暂存的本次爬取结果，finish 时合并到 metric_history / latest
+            CREATE TABLE IF NOT EXISTS ingest_staging (
+                crawl_time TEXT NOT NULL,
+                url TEXT NOT NULL,
+                rating REAL,
+                reviews_count INTEGER,
+                PRIMARY KEY (crawl_time, url)
+            ) WITHOUT ROWID;
+            """
+        )
+        self.conn.commit()
+        self.migrate_keys()
+
+    def migrate_keys(self):
+        """早期导入的记录以带 locale 参数的链接为键，统一改为不带 locale 参数的应用链接"""
+        with self.lock:
+            urls = [
+                row[0]
+                for row in self.conn.execute("SELECT url FROM latest WHERE url LIKE '%locale=%'")
+            ]
+            for url in urls:
+                key = app_key(url)
+                for table in ("metric_history", "latest"):
+                    # 新键已有记录（之后的爬取）时以新键为准
+                    self.conn.execute(
+                        f"UPDATE OR IGNORE {table} SET url = ? WHERE url = ?", (key, url)
+                    )
+                    self.conn.execute(f"DELETE FROM {table} WHERE url = ?", (url,))
+            if urls:
+                self.conn.commit()
+                print(f"历史库: {len(urls)} 个应用的链接已去掉 locale 参数")
+
+    def last_crawl_time(self):
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(crawl_time) FROM crawls").fetchone()
+        return row[0]
+
+    def can_ingest(self, crawl_time, source=None):
+        """调用方需持有 self.lock"""
+        if self.conn.execute(
+            "SELECT 1 FROM crawls WHERE crawl_time = ?", (crawl_time,)
+        ).fetchone():
+            return False
+        last = self.conn.execute("SELECT MAX(crawl_time) FROM crawls").fetchone()[0]
+        if last and crawl_time < last:
+            print(f"跳过 {source or crawl_time}：早于已导入的最近一次爬取 {last}")
+            return False
+        return True
+
+    def begin_ingest(self, crawl_time, source=None):
+        """
+        开始边爬边分批导入一次爬取，返回 CrawlIngest；
+        该爬取已导入过或早于最近一次导入时返回 None。
+        """
+        with self.lock:
+            if not self.can_ingest(crawl_time, source):
+                return None
+            # 清理中断的导入留下的暂存记录：同一次爬取的，以及已经不可能再导入的
+            self.conn.execute(
+                "DELETE FROM ingest_staging WHERE crawl_time = ?"
+                " OR crawl_time <= (SELECT MAX(crawl_time) FROM crawls)",
+                (crawl_time,),
+            )
+            self.conn.commit()
+        return CrawlIngest(self, crawl_time, source)
+
+    def ingest_rows(self, crawl_time, rows, source=None):
+        """
+        导入一次爬取的结果，返回 (行数, 有变化的行数)。
+        已导入过的爬取直接跳过；早于最近一次导入的爬取也跳过，
+        否则只存变化值的历史会被打乱。
+        """
+        with self.lock:
+            if not self.can_ingest(crawl_time, source):
+                return 0, 0
+
+            latest = {
+                url: (rating, reviews_count)
+                for url, rating, reviews_count in self.conn.execute(
+                    "SELECT url, rating, reviews_count FROM latest"
+                )
+            }
+            total = 0
+            changed = []
+            seen = set()
+            for row in rows:
+                url = row.get("url")
+                if not url:
+                    continue
+                # 多语言爬取时同一应用有多行，评分和评论数与语言无关，只取第一行
+                url = app_key(url)
+                if url in seen:
+                    continue
+                seen.add(url)
+                total += 1
+                values = tuple(CONVERTERS[metric](row.get(metric)) for metric in METRICS)
+                if latest.get(url) != values:
+                    latest[url] = values
+                    changed.append((url, crawl_time) + values)
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO metric_history VALUES (?, ?, ?, ?)", changed
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO latest VALUES (?, ?, ?, ?)", changed
+            )
+            self.conn.execute(
+                "INSERT INTO crawls VALUES (?, ?, ?, ?, ?)",
+                (crawl_time, source, total, len(changed), time.time()),
+            )
+            self.conn.commit()
+        return total, len(changed)
+
+    def ingest_csv(self, path):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return self.ingest_rows(crawl_time_from_path(path), csv.DictReader(f), path)
+
+    def ingest_directory(self, directory="."):
+        """按时间顺序导入目录下所有尚未导入的 app_titles_*.csv"""
+        paths = sorted(
+            glob.glob(os.path.join(directory, "app_titles_*.csv")), key=crawl_time_from_path
+        )
+        for path in paths:
+            rows, changed = self.ingest_csv(path)
+            if rows:
+                print(f"已导入 {path}: {rows} 条记录，{changed} 条有变化")
+
+    def trend(self, url):
+        """单个应用每次变化后的评分和评论数，按时间升序"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT crawl_time, rating, reviews_count FROM metric_history"
+                " WHERE url = ? ORDER BY crawl_time",
+                (app_key(url),),
+            ).fetchall()
+        return [
+            {"crawl_time": crawl_time, "rating": rating, "reviews_count": reviews_count}
+            for crawl_time, rating, reviews_count in rows
+        ]
+
+    def top_movers(self, metric="reviews_count", days=None, limit=10, ascending=False):
+        """
+        返回当前值相对 days 天前（默认最早一次记录）变化最大的应用。
+        基准值取不晚于该时间的最后一次变化，走 (url, crawl_time) 主键索引。
+        """
+        if metric not in METRICS:
+            raise ValueError(f"不支持的指标: {metric}")
+        with self.lock:
+            last = self.conn.execute("SELECT MAX(crawl_time) FROM crawls").fetchone()[0]
+            if last is None:
+                return []
+            if days is None:
+                since = self.conn.execute("SELECT MIN(crawl_time) FROM crawls").fetchone()[0]
+            else:
+                since = (datetime.fromisoformat(last) - timedelta(days=days)).isoformat()
+            order = "ASC" if ascending else "DESC"
+            rows = self.conn.execute(
+                f"""
+                SELECT url, previous, current, current - previous AS delta FROM (
+                    SELECT l.url, l.{metric} AS current, (
+                        SELECT h.{metric} FROM metric_history h
+                        WHERE h.url = l.url AND h.crawl_time <= ?
+                        ORDER BY h.crawl_time DESC LIMIT 1
+                    ) AS previous
+                    FROM latest l
+                )
+                WHERE previous IS NOT NULL AND current IS NOT NULL AND current != previous
+                ORDER BY delta {order}, url
+                LIMIT ?
+                """,
+                (since, limit),
+            ).fetchall()
+        return [
+            {
+                "url": url,
+                "previous": previous,
+                "current": current,
+                "delta": round(delta, 4) if isinstance(delta, float) else delta,
+                "change_pct": round(delta * 100 / previous, 2) if previous else None,
+            }
+            for url, previous, current, delta in rows
+        ]
+
+    def change_stats(self):
+        """
+        每个应用的 {url: (变化次数, 观察天数, 评论数日增量)}。
+        观察天数从该应用第一次出现算到最近一次爬取。
+        """
+        with self.lock:
+            last = self.conn.execute("SELECT MAX(crawl_time) FROM crawls").fetchone()[0]
+            rows = self.conn.execute(
+                "SELECT url, COUNT(*), MIN(crawl_time),"
+                " (SELECT h.reviews_count FROM metric_history h WHERE h.url = m.url"
+                "  ORDER BY h.crawl_time LIMIT 1),"
+                " (SELECT h.reviews_count FROM metric_history h WHERE h.url = m.url"
+                "  ORDER BY h.crawl_time DESC LIMIT 1)"
+                " FROM metric_history m GROUP BY url"
+            ).fetchall()
+        if last is None:
+            return {}
+        last = datetime.fromisoformat(last)
+        stats = {}
+        for url, count, first_time, first_reviews, last_reviews in rows:
+            days = (last - datetime.fromisoformat(first_time)).total_seconds() / 86400
+            velocity = 0.0
+            if days > 0 and first_reviews is not None and last_reviews is not None:
+                velocity = max(0.0, (last_reviews - first_reviews) / days)
+            stats[url] = (count - 1, days, velocity)
+        return stats
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class CrawlIngest:
+    """
+    分批导入一次爬取：每批在各自的短事务中写入暂存表 ingest_staging（同一应用只保留第一行），
+    不长时间占用写锁，其他进程仍可写入历史库。finish 时在一个事务中与 latest 比较，
+    把有变化的记录合并到 metric_history / latest 并登记本次爬取；abort 时删除暂存记录。
+    """
+
+    def __init__(self, store, crawl_time, source=None):
+        self.store = store
+        self.crawl_time = crawl_time
+        self.source = source
+
+    def add(self, rows):
+        staged = []
+        for row in rows:
+            url = row.get("url")
+            if not url:
+                continue
+            # 多语言爬取时同一应用有多行，评分和评论数与语言无关，只取第一行
+            values = tuple(CONVERTERS[metric](row.get(metric)) for metric in METRICS)
+            staged.append((self.crawl_time, app_key(url)) + values)
+        with self.store.lock:
+            self.store.conn.executemany(
+                "INSERT OR IGNORE INTO ingest_staging VALUES (?, ?, ?, ?)", staged
+            )
+            self.store.conn.commit()
+
+    def finish(self):
+        """合并本次导入，返回 (行数, 有变化的行数)"""
+        conn = self.store.conn
+        with self.store.lock:
+            # 暂存期间可能已导入了更晚的爬取
+            if not self.store.can_ingest(self.crawl_time, self.source):
+                self.discard()
+                return 0, 0
+            total = conn.execute(
+                "SELECT COUNT(*) FROM ingest_staging WHERE crawl_time = ?", (self.crawl_time,)
+            ).fetchone()[0]
+            changed = """
+                SELECT s.url, s.crawl_time, s.rating, s.reviews_count
+                FROM ingest_staging s LEFT JOIN latest l ON l.url = s.url
+                WHERE s.crawl_time = ? AND (l.url IS NULL
+                    OR l.rating IS NOT s.rating OR l.reviews_count IS NOT s.reviews_count)
+            """
+            # 先写 metric_history，此时 latest 还是旧值，两次查询得到同一批变化
+            count = conn.execute(
+                "INSERT OR REPLACE INTO metric_history " + changed, (self.crawl_time,)
+            ).rowcount
+            conn.execute("INSERT OR REPLACE INTO latest " + changed, (self.crawl_time,))
+            conn.execute(
+                "INSERT INTO crawls VALUES (?, ?, ?, ?, ?)",
+                (self.crawl_time, self.source, total, count, time.time()),
+            )
+            conn.execute("DELETE FROM ingest_staging WHERE crawl_time = ?", (self.crawl_time,))
+            conn.commit()
+        return total, count
+
+    def discard(self):
+        """调用方需持有 store.lock"""
+        self.store.conn.execute(
+            "DELETE FROM ingest_staging WHERE crawl_time = ?", (self.crawl_time,)
+        )
+        self.store.conn.commit()
+
+    def abort(self):
+        with self.store.lock:
+            self.discard()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入历史爬取结果到评分/评论数历史库")
+    parser.add_argument("--ingest", default=".", help="app_titles_*.csv 所在目录")
+    parser.add_argument("--db", default="app_history.sqlite", help="历史库路径")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.db)
+    store.ingest_directory(args.ingest)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import brotli  # noqa: F401  安装后 urllib3 会自动解压 br 编码
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    "Accept-Encoding": ACCEPT_ENCODING,
+    "Connection": "keep-alive",
+}
+
+# (连接超时, 读取超时)，单位秒
+DEFAULT_TIMEOUT = (10, 30)
+
+
+# 当前线程这次请求中建立连接各阶段的耗时，由 HttpClient.get 读取
+_timing = threading.local()
+
+
+def _record(stage, seconds):
+    stages = getattr(_timing, "stages", None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+
+class TimedConnectionMixin:
+    """新建连接时分别记录 DNS 解析和 TCP 连接耗时"""
+
+    def _new_conn(self):
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror:
+            infos = None  # 交给 urllib3 抛出原本的解析错误
+        resolved = time.perf_counter()
+        if infos:
+            _record("dns", resolved - start)
+            self._dns_host = infos[0][4][0]
+        try:
+            sock = super()._new_conn()
+        except Exception:
+            if self._dns_host == host:
+                raise
+            # 第一个地址连接失败时退回按主机名连接，尝试全部地址
+            self._dns_host = host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        _record("connect", time.perf_counter() - resolved)
+        return sock
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        # 空字典也要用同一个对象，_new_conn 会把 DNS 和 TCP 耗时写入其中
+        stages = getattr(_timing, "stages", None)
+        if stages is None:
+            stages = {}
+        before = stages.get("dns", 0.0) + stages.get("connect", 0.0)
+        start = time.perf_counter()
+        super().connect()
+        after = stages.get("dns", 0.0) + stages.get("connect", 0.0)
+        # connect() 的总耗时减去 DNS 和 TCP 连接即为 TLS 握手耗时
+        _record("tls", max(0.0, time.perf_counter() - start - (after - before)))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """
+    两个爬虫脚本共用的 HTTP 客户端：
+    基于 requests.Session 的长连接池，池大小与并发数一致，
+    统一配置请求头、超时和压缩传输，并统计连接复用和传输字节数。
+    传入 metrics（telemetry.Metrics）时按请求记录 DNS / 连接 / TLS / 首字节 / 下载耗时
+    和状态码分布。
+    """
+
+    def __init__(
+        self, pool_size=10, headers=None, timeout=DEFAULT_TIMEOUT, metrics=None
+    ):
+        self.timeout = timeout
+        self.metrics = metrics
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.adapter = TimedHTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self.lock = threading.Lock()
+        self.requests_count = 0
+        self.bytes_in = 0  # 线路上实际传输的（压缩后）字节数
+        self.bytes_decoded = 0  # 解压后的字节数
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        _timing.stages = {}
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+            # 读取 raw.tell() 前需要先把内容读完
+            content = response.content
+        finally:
+            stages = _timing.stages
+            _timing.stages = None
+        total = time.perf_counter() - start
+        wire_bytes = response.raw.tell() if response.raw is not None else 0
+        with self.lock:
+            self.requests_count += 1
+            self.bytes_in += wire_bytes or len(content)
+            self.bytes_decoded += len(content)
+
+        if self.metrics:
+            # elapsed 为发出请求到收到响应头的时间，包含建立连接
+            elapsed = response.elapsed.total_seconds()
+            for stage, seconds in stages.items():
+                self.metrics.observe(stage, seconds)
+            self.metrics.observe("ttfb", max(0.0, elapsed - sum(stages.values())))
+            self.metrics.observe("download", max(0.0, total - elapsed))
+            self.metrics.inc("http_responses", status=str(response.status_code))
+            self.metrics.inc("bytes_in", wire_bytes or len(content))
+        return response
+
+    def stream(self, url, chunk_size=64 * 1024, **kwargs):
+        """
+        流式请求，返回 (response, 分块迭代器)，不把整个响应体读入内存。
+        迭代结束后关闭响应并计入统计；不读取响应体时需调用 release(response)，
+        否则连接不会归还连接池。
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.get(url, stream=True, **kwargs)
+
+        def chunks():
+            decoded = 0
+            try:
+                for chunk in response.iter_content(chunk_size):
+                    decoded += len(chunk)
+                    yield chunk
+            finally:
+                self.release(response, decoded)
+
+        return response, chunks()
+
+    def release(self, response, decoded=0):
+        """关闭流式响应、归还连接并计入统计"""
+        wire_bytes = response.raw.tell() if response.raw is not None else 0
+        response.close()
+        with self.lock:
+            self.requests_count += 1
+            self.bytes_in += wire_bytes or decoded
+            self.bytes_decoded += decoded
+
+    def stats(self):
+        """返回请求数、新建连接数、复用连接数和传输字节数"""
+        new_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                new_connections += pool.num_connections
+        with self.lock:
+            requests_count = self.requests_count
+            bytes_in = self.bytes_in
+            bytes_decoded = self.bytes_decoded
+        return {
+            "requests": requests_count,
+            "new_connections": new_connections,
+            "reused_connections": max(0, requests_count - new_connections),
+            "bytes_in": bytes_in,
+            "bytes_decoded": bytes_decoded,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(
+            f"HTTP 请求数: {stats['requests']}，新建连接: {stats['new_connections']}，"
+            f"复用连接: {stats['reused_connections']}，"
+            f"传输字节: {stats['bytes_in']}（解压后 {stats['bytes_decoded']}）"
+        )
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
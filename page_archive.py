@@ -0,0 +1,125 @@
+import gzip
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+from state_store import hash_bytes
+
+# 压缩格式 -> 文件扩展名；读取时按扩展名选择解压方式，两种格式可以混存
+CODECS = {"zstd": ".zst", "gzip": ".gz"}
+DEFAULT_CODEC = "zstd" if HAS_ZSTD else "gzip"
+
+
+def blob_path(directory, body_hash, codec):
+    # 按哈希前两位分目录，避免单个目录下文件过多
+    return os.path.join(directory, "objects", body_hash[:2], body_hash + CODECS[codec])
+
+
+def compress(content, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return gzip.compress(content, compresslevel=6)
+
+
+def decompress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def read_blob(directory, body_hash):
+    """按响应体哈希读取并解压原始 HTML，可在解析子进程中调用"""
+    for codec in CODECS:
+        path = blob_path(directory, body_hash, codec)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                return decompress(f.read(), codec)
+    raise FileNotFoundError(f"存档中没有响应体: {body_hash}")
+
+
+class PageArchive:
+    """
+    原始页面存档：响应体按 sha256 内容寻址压缩保存在 objects/ 下，
+    相同内容只存一份；index.sqlite 记录每个 URL 最近一次抓取对应的哈希和编码。
+    解析规则变化后可以离线重新提取，不需要重新爬取。
+    """
+
+    def __init__(self, directory="page_archive", codec=None):
+        self.directory = directory
+        self.codec = codec or DEFAULT_CODEC
+        if self.codec == "zstd" and not HAS_ZSTD:
+            raise RuntimeError("zstd 压缩需要安装 zstandard")
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                encoding TEXT,
+                fetched_at REAL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def put(self, url, content, encoding="utf-8", body_hash=None):
+        """保存响应体并更新 URL 索引，返回响应体哈希"""
+        body_hash = body_hash or hash_bytes(content)
+        path = blob_path(self.directory, body_hash, self.codec)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再改名，中断时不会留下损坏的存档
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(compress(content, self.codec))
+            os.replace(temp_path, path)
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                (url, body_hash, encoding, time.time()),
+            )
+            self.conn.commit()
+        return body_hash
+
+    def get(self, url):
+        """返回 (原始 HTML 字节, 编码)，没有存档时返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body_hash, encoding FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return read_blob(self.directory, row[0]), row[1]
+
+    def entries(self):
+        """按 URL 顺序返回 [(url, body_hash, encoding), ...]，不读取响应体"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT url, body_hash, encoding FROM pages ORDER BY url"
+            ).fetchall()
+
+    def iter_pages(self):
+        """逐个产出 (url, 原始 HTML 字节, 编码)"""
+        for url, body_hash, encoding in self.entries():
+            yield url, read_blob(self.directory, body_hash), encoding
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,214 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fetch_engine import fetch_all
+from retry_scheduler import RetryableError
+
+
+def _timed_parse(parse, payload):
+    # 在子进程中执行，返回解析耗时以便统计解析阶段吞吐
+    start = time.perf_counter()
+    parsed = parse(payload)
+    return time.perf_counter() - start, parsed
+
+
+class StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0  # 各 worker 累计的处理时间（秒）
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.items += 1
+            self.busy += seconds
+
+    def summary(self, wall):
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 3),
+            "items_per_sec": round(self.items / wall, 2) if wall else 0,
+            # 单个 worker 满负荷时的处理能力，用来估算需要多少 worker
+            "items_per_worker_sec": round(self.items / self.busy, 2) if self.busy else 0,
+        }
+
+
+class ParsePipeline:
+    """
+    抓取线程与解析进程解耦的流水线：
+    fetch_all 驱动 fetchers 个线程执行 fetch(url)，把原始 HTML 放入有界队列；
+    parsers 个子进程执行 parse(payload)；主线程作为唯一写入端执行 finish。
+
+    fetch(url) 返回 ("result", result) 表示无需解析直接输出，
+    或 ("parse", payload) 表示交给解析进程；
+    parse 必须是可 pickle 的模块级函数；
+    finish(url, payload, parsed, error) 返回最终结果，抓取或解析出错时 error 为异常。
+    fetch_options 原样传给 fetch_all（限速、重试、并发控制）。
+    队列满时抓取阶段暂停，正在解析的任务数不超过 2 * parsers，内存占用有上限。
+    """
+
+    def __init__(
+        self,
+        fetch,
+        parse,
+        finish,
+        fetchers=8,
+        parsers=None,
+        queue_size=None,
+        fetch_options=None,
+        metrics=None,
+    ):
+        self.fetch = fetch
+        self.parse = parse
+        self.finish = finish
+        self.fetchers = fetchers
+        self.parsers = parsers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.parsers * 4
+        self.fetch_options = fetch_options or {}
+        self.metrics = metrics
+        self.fetch_stats = StageStats("fetch", self.fetchers)
+        self.parse_stats = StageStats("parse", self.parsers)
+        self.write_stats = StageStats("write", 1)
+        self.max_queue_depth = 0
+        self.wall = 0.0
+
+    def run(self, urls):
+        """按完成顺序产出 (url, result)"""
+        raw_queue = queue.Queue(maxsize=self.queue_size)
+        result_queue = queue.Queue()
+        in_flight = threading.Semaphore(self.parsers * 2)
+        stop = threading.Event()
+        end = object()
+        # URL 迭代器或 fetch_all 抛出的异常，由写入端在产出已完成的结果后重新抛出
+        failure = []
+
+        def timed_fetch(url):
+            start = time.perf_counter()
+            try:
+                return self.fetch(url)
+            except RetryableError:
+                raise
+            except Exception as e:
+                return "result", self.finish(url, None, None, e)
+            finally:
+                self.fetch_stats.add(time.perf_counter() - start)
+
+        def feed():
+            # fetch_all 在调用方线程中产出结果，这里阻塞在有界队列上即可形成背压
+            try:
+                for url, (kind, value) in fetch_all(
+                    urls, timed_fetch, concurrency=self.fetchers, **self.fetch_options
+                ):
+                    if stop.is_set():
+                        break
+                    if kind == "parse":
+                        while not stop.is_set():
+                            try:
+                                raw_queue.put((url, value), timeout=0.1)
+                                break
+                            except queue.Full:
+                                continue
+                        depth = raw_queue.qsize()
+                        self.max_queue_depth = max(self.max_queue_depth, depth)
+                        if self.metrics:
+                            self.metrics.set("parse_queue", depth)
+                    else:
+                        result_queue.put(("result", url, value))
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                raw_queue.put(end)
+
+        def dispatch(executor):
+            while True:
+                item = raw_queue.get()
+                if item is end:
+                    break
+                url, payload = item
+                in_flight.acquire()
+                if stop.is_set():
+                    in_flight.release()
+                    continue
+                try:
+                    future = executor.submit(_timed_parse, self.parse, payload)
+                except RuntimeError:
+                    # 写入端提前退出，进程池已关闭
+                    in_flight.release()
+                    continue
+
+                def done(future, url=url, payload=payload):
+                    in_flight.release()
+                    result_queue.put(("parsed", url, payload, future))
+
+                future.add_done_callback(done)
+            # 等待所有解析任务完成后再通知写入端结束
+            for _ in range(self.parsers * 2):
+                in_flight.acquire()
+            result_queue.put(end)
+
+        start = time.perf_counter()
+        executor = ProcessPoolExecutor(max_workers=self.parsers)
+        threads = [
+            threading.Thread(target=feed, daemon=True),
+            threading.Thread(target=dispatch, args=(executor,), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = result_queue.get()
+                if item is end:
+                    if failure:
+                        raise failure[0]
+                    break
+                write_start = time.perf_counter()
+                if item[0] == "result":
+                    _, url, result = item
+                else:
+                    _, url, payload, future = item
+                    try:
+                        seconds, parsed = future.result()
+                        self.parse_stats.add(seconds)
+                        if self.metrics:
+                            self.metrics.observe("parse", seconds)
+                        result = self.finish(url, payload, parsed, None)
+                    except Exception as e:
+                        result = self.finish(url, payload, None, e)
+                self.write_stats.add(time.perf_counter() - write_start)
+                yield url, result
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.wall = time.perf_counter() - start
+
+    def stats(self):
+        return {
+            "wall_seconds": round(self.wall, 3),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_size": self.queue_size,
+            "stages": [
+                stage.summary(self.wall)
+                for stage in (self.fetch_stats, self.parse_stats, self.write_stats)
+            ],
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(
+            f"流水线用时 {stats['wall_seconds']} 秒，"
+            f"队列最大深度 {stats['max_queue_depth']}/{stats['queue_size']}"
+        )
+        for stage in stats["stages"]:
+            print(
+                f"  {stage['stage']:>5}: {stage['workers']} 个 worker，"
+                f"处理 {stage['items']}，{stage['items_per_sec']} 个/秒，"
+                f"单 worker {stage['items_per_worker_sec']} 个/秒"
+            )
@@ -0,0 +1,42 @@
+import json
+import os
+import time
+
+# 最新数据集的清单文件，与数据文件放在同一目录
+MANIFEST_NAME = "latest.json"
+
+
+def manifest_path(directory="."):
+    return os.path.join(directory, MANIFEST_NAME)
+
+
+def publish_dataset(path, **info):
+    """
+    把已经完整写好的数据文件登记为最新数据集。
+    清单先写临时文件并 fsync，再用 os.replace 原子替换，API 只需要 stat 清单
+    就能发现新数据集，不会读到写了一半的文件。清单中只记录文件名。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    manifest = {
+        "dataset": os.path.basename(path),
+        "published_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **info,
+    }
+    target = manifest_path(directory)
+    temp_path = target + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, target)
+    print(f"已发布数据集: {path}")
+    return target
+
+
+def read_manifest(directory="."):
+    """返回清单内容，还没有发布过数据集时返回 None"""
+    try:
+        with open(manifest_path(directory), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
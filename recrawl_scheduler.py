@@ -0,0 +1,94 @@
+import math
+import time
+
+from extractors import app_key
+
+# 没有任何历史时假设应用平均每 7 天变化一次
+DEFAULT_CHANGE_RATE = 1 / 7
+DAY = 86400
+
+
+class RecrawlScheduler:
+    """
+    按“自上次抓取以来已经变化的概率”排序的重爬调度。
+    每个应用的变化视为泊松过程，变化率（次/天）取 历史变化次数 / 观察天数
+    与 评论数日增量 中的较大值，没有历史时用所有应用的平均变化率；
+    已变化的概率 = 1 - exp(-变化率 × 距上次抓取的天数)。
+    状态库记录了提取结果最后一次变化的时间，已连续 N 天（N ≥ 1）抓取到相同结果的应用，
+    变化率最多取 1 / N，长期不变的应用逐渐降低优先级。
+    从未抓取过的应用（sitemap 中新出现的）排在最前面。
+    状态库以抓取的链接为键，历史库以不带 locale 参数的应用链接为键，查变化率时先转换。
+    """
+
+    def __init__(self, state, history=None, now=None):
+        self.state = state
+        self.now = now or time.time()
+        self.crawl_times = state.crawl_times()
+        self.rates = {}
+        if history is not None:
+            for url, (changes, days, velocity) in history.change_stats().items():
+                change_rate = changes / days if days > 0 else 0.0
+                self.rates[url] = max(change_rate, velocity)
+        observed = [rate for rate in self.rates.values() if rate > 0]
+        self.default_rate = sum(observed) / len(observed) if observed else DEFAULT_CHANGE_RATE
+
+    def change_rate(self, url, fetched_at, changed_at):
+        rate = self.rates.get(app_key(url)) or self.default_rate
+        if changed_at is not None:
+            quiet_days = (fetched_at - changed_at) / DAY
+            if quiet_days >= 1:
+                rate = min(rate, 1 / quiet_days)
+        return rate
+
+    def change_probability(self, url):
+        fetched_at, changed_at = self.crawl_times.get(url) or (None, None)
+        if fetched_at is None:
+            return None
+        age_days = max(0.0, self.now - fetched_at) / DAY
+        return 1 - math.exp(-self.change_rate(url, fetched_at, changed_at) * age_days)
+
+    def priority(self, url):
+        probability = self.change_probability(url)
+        return 2.0 if probability is None else probability
+
+    def order(self, urls):
+        """按优先级从高到低排序，优先级相同时保持原顺序"""
+        urls = list(urls)
+        return sorted(urls, key=self.priority, reverse=True)
+
+    def coverage(self, urls, fresh_hours=24):
+        """
+        爬取结束后的新鲜度统计：fresh_hours 小时内抓取过的应用比例、
+        从未抓取的应用数，以及估计已变化但仍未刷新的应用数。
+        """
+        self.crawl_times = self.state.crawl_times()
+        self.now = time.time()
+        urls = list(dict.fromkeys(urls))
+        fresh = never = 0
+        expected_stale = 0.0
+        for url in urls:
+            fetched_at = (self.crawl_times.get(url) or (None, None))[0]
+            if fetched_at is None:
+                never += 1
+                continue
+            if self.now - fetched_at <= fresh_hours * 3600:
+                fresh += 1
+            expected_stale += self.change_probability(url)
+        total = len(urls)
+        return {
+            "total": total,
+            "fresh": fresh,
+            "fresh_pct": round(fresh * 100 / total, 2) if total else 0.0,
+            "never_crawled": never,
+            "expected_stale": round(expected_stale, 1),
+            "fresh_hours": fresh_hours,
+        }
+
+    def print_coverage(self, urls, fresh_hours=24):
+        stats = self.coverage(urls, fresh_hours)
+        print(
+            f"新鲜度覆盖: {stats['fresh_hours']} 小时内抓取过 {stats['fresh']}/{stats['total']}"
+            f"（{stats['fresh_pct']}%），从未抓取 {stats['never_crawled']}，"
+            f"估计已变化但未刷新约 {stats['expected_stale']} 个"
+        )
+        return stats
@@ -0,0 +1,152 @@
+import csv
+import glob
+import os
+
+RESULT_FIELDS = [
+    "url",
+    "title",
+    "rating",
+    "reviews_count",
+    "main_description",
+    "detailed_description",
+    "detail_points",
+    "category",
+    "release_date",
+    "website",
+    "complete_information",
+    "locale",
+]
+ERROR_FIELDS = ["url", "field", "error_message"]
+
+
+class AppendCsv:
+    """
+    追加写入的 CSV 文件，第一次写入时才创建，新文件写表头。
+    写入期间使用 <path>.partial，API 和历史库按文件名查找数据时不会发现它，
+    finish 时再改名为 path。
+    """
+
+    def __init__(self, path, fieldnames):
+        self.path = path
+        self.partial_path = path + ".partial"
+        self.fieldnames = fieldnames
+        self.file = None
+        self.writer = None
+        # rows 只统计本次写入的行数，existing 为 --resume 前 .partial 中已有的行数
+        self.rows = 0
+        self.existing = self.count_rows(self.partial_path)
+
+    @staticmethod
+    def count_rows(path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            # 字段中可能有换行，按 CSV 解析计数，去掉表头
+            return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+    @property
+    def total(self):
+        return self.existing + self.rows
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self.file is None:
+            is_new = (
+                not os.path.exists(self.partial_path) or os.path.getsize(self.partial_path) == 0
+            )
+            self.file = open(self.partial_path, "a", newline="", encoding="utf-8-sig")
+            self.writer = csv.DictWriter(
+                self.file, fieldnames=self.fieldnames, extrasaction="ignore"
+            )
+            if is_new:
+                self.writer.writeheader()
+        self.writer.writerows(rows)
+        self.rows += len(rows)
+
+    def sync(self):
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def finish(self):
+        """把写完的文件改名到最终路径"""
+        self.close()
+        if os.path.exists(self.partial_path):
+            os.replace(self.partial_path, self.path)
+
+
+class StreamingResultWriter:
+    """
+    边爬边写的结果写入器：结果和错误先缓存在内存中，
+    每满 batch_size 个 URL 追加写入 app_titles_*.csv.partial / scraping_errors_*.csv.partial
+    并落盘，然后才把这批 URL 写入检查点文件，保证检查点中的 URL 一定已经写入结果。
+    整轮爬取完成时才改名为 .csv，中断后 --resume 继续追加到 .partial 文件。
+    """
+
+    def __init__(self, timestamp, batch_size=100, directory="."):
+        self.timestamp = timestamp
+        self.batch_size = batch_size
+        self.results = AppendCsv(
+            os.path.join(directory, f"app_titles_{timestamp}.csv"), RESULT_FIELDS
+        )
+        self.errors = AppendCsv(
+            os.path.join(directory, f"scraping_errors_{timestamp}.csv"), ERROR_FIELDS
+        )
+        self.checkpoint_path = os.path.join(
+            directory, f"app_titles_{timestamp}.checkpoint"
+        )
+        self.checkpoint = open(self.checkpoint_path, "a", encoding="utf-8")
+        self.pending_results = []
+        self.pending_errors = []
+        self.pending_urls = []
+
+    def write(self, url, data, errors):
+        if data:
+            self.pending_results.append(data)
+        self.pending_errors.extend(errors)
+        self.pending_urls.append(url)
+        if len(self.pending_urls) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        self.results.write_rows(self.pending_results)
+        self.errors.write_rows(self.pending_errors)
+        self.results.sync()
+        self.errors.sync()
+        if self.pending_urls:
+            self.checkpoint.write("".join(f"{url}\n" for url in self.pending_urls))
+            self.checkpoint.flush()
+            os.fsync(self.checkpoint.fileno())
+        self.pending_results = []
+        self.pending_errors = []
+        self.pending_urls = []
+
+    def close(self, finished=True):
+        """finished 为 True 表示整轮爬取完成，结果改名为最终文件并删除检查点文件"""
+        self.flush()
+        self.checkpoint.close()
+        if finished:
+            self.results.finish()
+            self.errors.finish()
+            os.remove(self.checkpoint_path)
+        else:
+            self.results.close()
+            self.errors.close()
+
+
+def find_resumable_run(directory="."):
+    """找到最近一次未完成的爬取，返回 (timestamp, 已完成的 URL 集合)"""
+    checkpoints = glob.glob(os.path.join(directory, "app_titles_*.checkpoint"))
+    if not checkpoints:
+        return None, set()
+    latest = max(checkpoints, key=os.path.getmtime)
+    timestamp = os.path.basename(latest)[len("app_titles_") : -len(".checkpoint")]
+    with open(latest, encoding="utf-8") as f:
+        completed = {line.rstrip("\n") for line in f if line.strip()}
+    return timestamp, completed
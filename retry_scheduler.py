@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# 需要重试的状态码；429 和 503 同时视为被限流
+RETRY_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+
+
+class RetryableError(Exception):
+    """可重试的失败：限流、服务端错误或网络错误"""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """解析 Retry-After 头，支持秒数和 HTTP 日期两种格式，返回秒数或 None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """指数退避 + 全抖动，服务端给出 Retry-After 时不早于它"""
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=60.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt, retry_after=None):
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            return max(backoff, min(retry_after, self.max_delay * 10))
+        return backoff
+
+
+class AimdController:
+    """
+    AIMD 并发控制：每连续成功 increase_every 次并发数加一，
+    被限流时并发数减半（cooldown 秒内只减一次）。
+    连续失败达到 breaker_threshold 次时熔断 breaker_cooldown 秒，
+    之后半开，只放行一个探测请求，成功后恢复。
+    """
+
+    def __init__(
+        self,
+        max_limit,
+        min_limit=1,
+        increase_every=10,
+        cooldown=5.0,
+        breaker_threshold=20,
+        breaker_cooldown=30.0,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = min(min_limit, self.max_limit)
+        self.limit_value = self.max_limit
+        self.increase_every = increase_every
+        self.cooldown = cooldown
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.successes = 0
+        self.consecutive_failures = 0
+        self.last_decrease = 0.0
+        self.open_until = 0.0
+        self.tripped_at = 0.0
+        self.half_open = False
+        self.throttled = 0
+        self.breaker_trips = 0
+        self.lock = threading.Lock()
+
+    def limit(self):
+        """当前允许的并发数，熔断期间为 0"""
+        with self.lock:
+            if time.monotonic() < self.open_until:
+                return 0
+            if self.half_open:
+                return 1
+            return self.limit_value
+
+    def reopen_at(self):
+        with self.lock:
+            return self.open_until
+
+    def on_success(self, started=None):
+        """熔断前已发出、之后才成功的请求不代表探测成功，半开状态下不据此恢复"""
+        with self.lock:
+            if self.half_open and started is not None and started < self.tripped_at:
+                return
+            self.consecutive_failures = 0
+            self.half_open = False
+            self.successes += 1
+            if self.successes >= self.increase_every and self.limit_value < self.max_limit:
+                self.limit_value += 1
+                self.successes = 0
+
+    def on_failure(self, error, started=None):
+        """
+        started 为请求开始的时间（time.monotonic()）。熔断后只有半开状态下的探测请求失败
+        才再次熔断，熔断前已发出、之后才失败的请求不计入。
+        """
+        now = time.monotonic()
+        with self.lock:
+            if self.half_open and started is not None and started < self.tripped_at:
+                if error.status_code in THROTTLE_STATUS:
+                    self.throttled += 1
+                return
+            self.successes = 0
+            self.consecutive_failures += 1
+            if error.status_code in THROTTLE_STATUS:
+                self.throttled += 1
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit_value = max(self.min_limit, self.limit_value // 2)
+                    self.last_decrease = now
+            if self.half_open or self.consecutive_failures >= self.breaker_threshold:
+                self.open_until = now + self.breaker_cooldown
+                self.tripped_at = now
+                self.half_open = True
+                self.consecutive_failures = 0
+                self.breaker_trips += 1
+                print(f"连续失败过多，暂停请求 {self.breaker_cooldown:.0f} 秒")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "concurrency_limit": self.limit_value,
+                "throttled": self.throttled,
+                "breaker_trips": self.breaker_trips,
+            }
@@ -1,47 +1,101 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-import time
-from urllib.parse import urljoin
+import re
 import os
 import time
+from xml.etree import ElementTree
+
+from http_client import HttpClient
+
+
+APP_URL_PREFIX = "https://apps.shopify.com/"
+
+# 过滤不需要的链接：按路径段匹配，避免应用名中包含这些词时被误过滤
+EXCLUDE_PATHS = [
+    "categories",
+    "partner",
+    "partners",
+    "stories",
+    "compare",
+    "collections",
+    "app-groups",
+]
+EXCLUDE_RE = re.compile(
+    r"(?:^|/)(?:%s)(?:/|$)" % "|".join(re.escape(path) for path in EXCLUDE_PATHS)
+)
+
+
+def local_name(tag):
+    # 去掉 {namespace} 前缀
+    return tag.rsplit("}", 1)[-1]
+
+
+def is_app_url(url):
+    if not url.startswith(APP_URL_PREFIX):
+        return False
+    path = url[len(APP_URL_PREFIX) :].split("?", 1)[0]
+    return bool(path) and not EXCLUDE_RE.search(path)
 
 
 class ShopifyAppScraper:
-    def __init__(self):
-        self.base_url = "https://apps.shopify.com/sitemap?locale=zh-CN"
+    def __init__(self, client=None, locale="zh-CN"):
+        self.base_url = f"https://apps.shopify.com/sitemap?locale={locale}"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
         self.apps_data = []
+        self.client = client or HttpClient(pool_size=1, headers=self.headers)
 
-    def get_app_listings(self):
-        url = f"{self.base_url}"
+    def iter_sitemap_locs(self, url):
+        """
+        边下载边解析 sitemap，逐个产出 <loc>；遇到 sitemap 索引时递归进入子 sitemap。
+        已处理的节点会被清除，内存占用与 sitemap 大小无关。
+        """
         print(f"页面url: {url}")
-        response = requests.get(url, headers=self.headers)
+        response, chunks = self.client.stream(url)
         print(f"页面状态码: {response.status_code}")
+        if response.status_code != 200:
+            # 分块迭代器还没开始，关闭它不会关闭响应，需要直接释放连接
+            self.client.release(response)
+            return
+
+        parser = ElementTree.XMLPullParser(events=("start", "end"))
+        root = None
+        is_index = False
+        children = []  # 索引文件很小，读完后再依次请求子 sitemap，避免同时占用两个连接
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if root is None:
+                        root = elem
+                        is_index = local_name(elem.tag) == "sitemapindex"
+                    continue
+                tag = local_name(elem.tag)
+                if tag == "loc" and elem.text:
+                    loc = elem.text.strip()
+                    if is_index:
+                        children.append(loc)
+                    else:
+                        yield loc
+                elif tag in ("url", "sitemap"):
+                    root.clear()
+        parser.close()
+
+        for child in children:
+            yield from self.iter_sitemap_locs(child)
+
+    def iter_app_urls(self):
+        """按顺序惰性产出符合条件的应用URL，调用方可以在 sitemap 下载完成前开始消费"""
+        seen = set()
+        for url in self.iter_sitemap_locs(self.base_url):
+            if url not in seen and is_app_url(url):
+                seen.add(url)
+                yield url
 
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, features="xml")
-            
-            # 找到所有 loc 标签
-            all_locs = soup.find_all("loc")
-            
-            # 过滤不需要的链接
-            filtered_urls = []
-            exclude_paths = ['categories', 'partner', 'stories', 'compare', 'collections', 'app-groups']
-            
-            for loc in all_locs:
-                url = loc.text.strip()
-                if url.startswith('https://apps.shopify.com/'):
-                    # 检查URL是否包含需要排除的路径
-                    path = url.split('apps.shopify.com/')[1]
-                    if not any(exclude in path for exclude in exclude_paths):
-                        filtered_urls.append(url)
-            
-            print(f"找到 {len(filtered_urls)} 个符合条件的应用URL")
-            return filtered_urls
-        return []
+    def get_app_listings(self):
+        filtered_urls = list(self.iter_app_urls())
+        print(f"找到 {len(filtered_urls)} 个符合条件的应用URL")
+        return filtered_urls
 
     def extract_app_info(self, link):
         try:
@@ -52,17 +106,15 @@ class ShopifyAppScraper:
             return None
 
     def scrape_apps(self):
-        app_listings = self.get_app_listings()
-        print(f"当前数据: {app_listings}")
-
-        if not app_listings:
-            print(f"停止爬取")
-
-        for link in app_listings:
+        for link in self.iter_app_urls():
             app_info = self.extract_app_info(link)
             if app_info:
                 self.apps_data.append(app_info)
 
+        print(f"找到 {len(self.apps_data)} 个符合条件的应用URL")
+        if not self.apps_data:
+            print(f"停止爬取")
+
 
     def save_to_csv(self):
         # 添加调试信息
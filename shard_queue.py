@@ -0,0 +1,190 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def app_handle(url):
+    """应用链接的最后一段路径，例如 https://apps.shopify.com/klaviyo -> klaviyo"""
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1] or url
+
+
+def jump_hash(key, buckets):
+    """
+    Jump 一致性哈希（Lamping & Veach）：分片数从 n 变为 n + 1 时
+    只有约 1 / (n + 1) 的 key 换到新分片，其余保持不变。
+    """
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+def shard_of(url, shards):
+    digest = hashlib.sha1(app_handle(url).encode("utf-8")).digest()
+    return jump_hash(int.from_bytes(digest[:8], "big"), shards)
+
+
+class ShardQueue:
+    """
+    基于租约的分片队列（SQLite）。协调者把 URL 按应用 handle 的一致性哈希分到各分片，
+    worker 通过 claim 领取分片并定期 renew 续约；worker 退出或宕机后租约过期，
+    分片会被其他 worker 重新领取。
+    多台机器共用时把数据库放在共享存储上，或用实现相同方法的其他后端替换。
+    """
+
+    def __init__(self, path="crawl_shards.sqlite", lease_seconds=300):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                shards INTEGER NOT NULL,
+                created_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS shards (
+                job_id TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                output TEXT,
+                PRIMARY KEY (job_id, shard)
+            );
+            CREATE TABLE IF NOT EXISTS shard_urls (
+                job_id TEXT NOT NULL,
+                shard INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (job_id, shard, url)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def create_job(self, job_id, urls, shards):
+        """把 URL 分到 shards 个分片并登记任务，返回各分片的 URL 数"""
+        counts = [0] * shards
+        rows = []
+        for url in urls:
+            shard = shard_of(url, shards)
+            counts[shard] += 1
+            rows.append((job_id, shard, url))
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute(
+                    "INSERT INTO jobs VALUES (?, ?, ?)", (job_id, shards, time.time())
+                )
+                self.conn.executemany(
+                    "INSERT INTO shards (job_id, shard) VALUES (?, ?)",
+                    [(job_id, shard) for shard in range(shards)],
+                )
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO shard_urls VALUES (?, ?, ?)", rows
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def latest_job(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT job_id FROM jobs ORDER BY created_at DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def claim(self, job_id, worker):
+        """
+        领取一个待处理或租约已过期的分片，返回分片号；没有可领取的分片时返回 None。
+        BEGIN IMMEDIATE 保证多个 worker 不会领到同一个分片。
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT shard, status, worker FROM shards WHERE job_id = ?"
+                    " AND (status = 'pending' OR (status = 'leased' AND lease_until < ?))"
+                    " ORDER BY status = 'leased', shard LIMIT 1",
+                    (job_id, now),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                shard, status, previous = row
+                self.conn.execute(
+                    "UPDATE shards SET status = 'leased', worker = ?, lease_until = ?,"
+                    " attempts = attempts + 1 WHERE job_id = ? AND shard = ?",
+                    (worker, now + self.lease_seconds, job_id, shard),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if status == "leased":
+            print(f"分片 {shard} 的租约已过期（原 worker {previous}），重新领取")
+        return shard
+
+    def renew(self, job_id, shard, worker):
+        """续约，返回租约是否仍属于该 worker"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE shards SET lease_until = ? WHERE job_id = ? AND shard = ?"
+                " AND worker = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, job_id, shard, worker),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id, shard, worker, output):
+        """标记分片完成并记录输出文件，租约已被其他 worker 接手时返回 False"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE shards SET status = 'done', output = ?, lease_until = NULL"
+                " WHERE job_id = ? AND shard = ? AND worker = ? AND status = 'leased'",
+                (output, job_id, shard, worker),
+            )
+        return cursor.rowcount == 1
+
+    def urls(self, job_id, shard):
+        with self.lock:
+            return [
+                row[0]
+                for row in self.conn.execute(
+                    "SELECT url FROM shard_urls WHERE job_id = ? AND shard = ? ORDER BY url",
+                    (job_id, shard),
+                )
+            ]
+
+    def status(self, job_id):
+        """各状态的分片数，例如 {"pending": 3, "leased": 2, "done": 11}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT status, COUNT(*) FROM shards WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def outputs(self, job_id):
+        """已完成分片的输出，按分片号排序"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT shard, output FROM shards WHERE job_id = ? AND status = 'done'"
+                " ORDER BY shard",
+                (job_id,),
+            ).fetchall()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+def hash_bytes(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_record(data):
+    # 只对解析出的字段做哈希，排序后序列化保证稳定
+    payload = json.dumps(data, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    增量爬取的本地状态库（SQLite，以应用 URL 为主键），
+    保存 ETag / Last-Modified、响应体哈希、字段哈希和上一次的记录。
+    """
+
+    def __init__(self, path="crawl_state.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS app_state (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body_hash TEXT,
+                data_hash TEXT,
+                record TEXT,
+                fetched_at REAL,
+                changed_at REAL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def get(self, url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, body_hash, data_hash, record"
+                " FROM app_state WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            "etag": row[0],
+            "last_modified": row[1],
+            "body_hash": row[2],
+            "data_hash": row[3],
+            "record": json.loads(row[4]) if row[4] else None,
+        }
+
+    def conditional_headers(self, previous):
+        """根据上一次的状态生成条件请求头"""
+        headers = {}
+        if previous and previous["record"]:
+            if previous["etag"]:
+                headers["If-None-Match"] = previous["etag"]
+            if previous["last_modified"]:
+                headers["If-Modified-Since"] = previous["last_modified"]
+        return headers
+
+    def touch(self, url, etag=None, last_modified=None):
+        """内容未变化时只更新抓取时间和校验头"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE app_state SET fetched_at = ?,"
+                " etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)"
+                " WHERE url = ?",
+                (time.time(), etag, last_modified, url),
+            )
+            self.conn.commit()
+
+    def save(self, url, data, etag=None, last_modified=None, body_hash=None):
+        """保存解析结果，返回字段内容是否相对上一次发生了变化"""
+        data_hash = hash_record(data)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data_hash, changed_at FROM app_state WHERE url = ?", (url,)
+            ).fetchone()
+            changed = not row or row[0] != data_hash
+            changed_at = now if changed else row[1]
+            self.conn.execute(
+                "INSERT OR REPLACE INTO app_state"
+                " (url, etag, last_modified, body_hash, data_hash, record, fetched_at, changed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    etag,
+                    last_modified,
+                    body_hash,
+                    data_hash,
+                    json.dumps(data, ensure_ascii=False, default=str),
+                    now,
+                    changed_at,
+                ),
+            )
+            self.conn.commit()
+        return changed
+
+    def crawl_times(self):
+        """所有应用的 {url: (最近抓取时间, 最近变化时间)}"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, fetched_at, changed_at FROM app_state"
+            ).fetchall()
+        return {url: (fetched_at, changed_at) for url, fetched_at, changed_at in rows}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
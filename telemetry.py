@@ -0,0 +1,153 @@
+import bisect
+import json
+import threading
+
+# 延迟直方图的桶上限（秒）
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按桶估算分位数（取所在桶的上限）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """
+    线程安全的指标注册表：按阶段记录延迟直方图，另有计数器和瞬时值（如队列深度）。
+    可以导出 Prometheus 文本格式，也可以导出 JSON 摘要。
+    """
+
+    def __init__(self, prefix="crawl"):
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+
+    def summary(self):
+        with self.lock:
+            return {
+                "stages": {
+                    stage: histogram.summary()
+                    for stage, histogram in sorted(self.histograms.items())
+                },
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+            }
+
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            name = f"{self.prefix}_stage_seconds"
+            if self.histograms:
+                lines.append(f"# TYPE {name} histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+            lines.extend(self._render_samples(self.counters, "counter", "_total"))
+            lines.extend(self._render_samples(self.gauges, "gauge", ""))
+        return "\n".join(lines) + "\n"
+
+    def _render_samples(self, samples, kind, suffix):
+        lines = []
+        declared = set()
+        for (name, labels), value in sorted(samples.items()):
+            metric = f"{self.prefix}_{name}{suffix}"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} {kind}")
+                declared.add(metric)
+            label_text = ",".join(f'{key}="{value_}"' for key, value_ in labels)
+            lines.append(f"{metric}{{{label_text}}} {value}" if label_text else f"{metric} {value}")
+        return lines
+
+    def write_summary(self, path, **extra):
+        summary = self.summary()
+        summary.update(extra)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        return summary
+
+    def print_summary(self):
+        for stage, stats in self.summary()["stages"].items():
+            print(
+                f"  {stage:>8}: {stats['count']} 次，平均 {stats['mean'] * 1000:.1f}ms，"
+                f"p50 ≤{stats['p50'] * 1000:g}ms，p99 ≤{stats['p99'] * 1000:g}ms"
+            )
+
+
+def summary_to_prometheus(summary, prefix="crawl_last"):
+    """把爬取结束时写出的 JSON 摘要转换为 Prometheus 文本格式的瞬时值"""
+    lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+    for stage, stats in summary.get("stages", {}).items():
+        for key in ("mean", "p50", "p90", "p99"):
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}",stat="{key}"}} {stats[key]}')
+    for item in summary.get("counters", []):
+        labels = ",".join(f'{key}="{value}"' for key, value in item["labels"].items())
+        metric = f"{prefix}_{item['name']}"
+        lines.append(f"{metric}{{{labels}}} {item['value']}" if labels else f"{metric} {item['value']}")
+    for item in summary.get("gauges", []):
+        labels = ",".join(f'{key}="{value}"' for key, value in item["labels"].items())
+        metric = f"{prefix}_{item['name']}"
+        lines.append(f"{metric}{{{labels}}} {item['value']}" if labels else f"{metric} {item['value']}")
+    if "elapsed_seconds" in summary:
+        lines.append(f"{prefix}_elapsed_seconds {summary['elapsed_seconds']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import distributed_crawl
+from shard_queue import ShardQueue
+
+
+def make_queue(tmp_path):
+    queue = ShardQueue(str(tmp_path / "shards.sqlite"))
+    queue.create_job("job", ["https://apps.shopify.com/a", "https://apps.shopify.com/b"], 1)
+    return queue
+
+
+def temp_files(tmp_path):
+    directory = os.path.join(str(tmp_path), "shards_job")
+    return [name for name in os.listdir(directory) if name.endswith(".tmp")]
+
+
+def test_lease_lost_keeps_new_workers_result(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    _, results_path, errors_path = distributed_crawl.shard_paths(str(tmp_path), "job", 0)
+
+    def stalled_crawl(client, urls, results_temp, errors_temp, *args):
+        for path in (results_temp, errors_temp):
+            with open(path, "w") as f:
+                f.write("a")
+        # 本 worker 还在抓取时租约过期，另一个 worker 重新领取并完成同一分片
+        queue.conn.execute("UPDATE shards SET lease_until = 0")
+        assert queue.claim("job", "worker-b") == 0
+        for path in (results_path, errors_path):
+            with open(path, "w") as f:
+                f.write("b")
+        assert queue.complete("job", 0, "worker-b", results_path)
+        return 2, 0
+
+    monkeypatch.setattr(distributed_crawl, "crawl_shard", stalled_crawl)
+    distributed_crawl.work(queue, "job", str(tmp_path), poll=0)
+
+    with open(results_path) as f:
+        assert f.read() == "b"
+    assert temp_files(tmp_path) == []
+    assert queue.status("job") == {"done": 1}
+    assert queue.outputs("job") == [(0, results_path)]
+    queue.close()
+
+
+def test_shard_marked_done_after_output_in_place(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    _, results_path, _ = distributed_crawl.shard_paths(str(tmp_path), "job", 0)
+
+    def crawl(client, urls, results_temp, errors_temp, *args):
+        for path in (results_temp, errors_temp):
+            with open(path, "w") as f:
+                f.write("a")
+        return 2, 0
+
+    complete = queue.complete
+
+    def checked_complete(job_id, shard, worker, output):
+        assert os.path.exists(output)
+        return complete(job_id, shard, worker, output)
+
+    monkeypatch.setattr(distributed_crawl, "crawl_shard", crawl)
+    monkeypatch.setattr(queue, "complete", checked_complete)
+    distributed_crawl.work(queue, "job", str(tmp_path), poll=0)
+
+    assert queue.status("job") == {"done": 1}
+    assert temp_files(tmp_path) == []
+    queue.close()
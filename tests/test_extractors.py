@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from extractors import parse_app_page
+
+FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+URL = "https://apps.shopify.com/example-app"
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", ["app_page.html", "app_page_nested_website.html"])
+def test_lxml_matches_bs4(name):
+    html = read_fixture(name)
+    assert parse_app_page(URL, html, backend="lxml") == parse_app_page(URL, html, backend="bs4")
+
+
+def test_nested_website_link():
+    html = read_fixture("app_page_nested_website.html")
+    for backend in ("lxml", "bs4"):
+        data, _, _ = parse_app_page(URL, html, backend=backend)
+        assert data["website"] == "https://example.com/nested"